@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import zlib
+from typing import Optional
+
+import metrics
+import utils
+
+
+DEFAULT_MEET = 'meet'
+FOLDER_CODES = {folder: cod for cod, folder in utils.FILE_TYPES.items()}  # `scrape_data`'s folder -> Microplus `cod`
+
+
+class Archive:
+    """Scraped data of one or more meets in a single SQLite file, a `repository.ScrapedData` store.
+
+    Documents are content-addressed: `blobs` holds every distinct document once, zlib-compressed and keyed by the
+    sha256 of its content, `documents` maps each meet's paths (and their Microplus `nomefile` and `cod`) to a blob.
+    Identical documents of different scrapes or meets share their blob, and any document is read without unpacking the
+    others.
+
+    Args:
+        path (str): archive file, created if missing
+        meet (str): meet whose documents are read and written
+    """
+
+    def __init__(self, path: str, meet: str = DEFAULT_MEET) -> None:
+        self.path = path
+        self.meet = meet
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, size INTEGER, data BLOB);
+            CREATE TABLE IF NOT EXISTS documents (
+                meet TEXT, path TEXT, folder TEXT, name TEXT, nomefile TEXT, cod TEXT, hash TEXT REFERENCES blobs,
+                PRIMARY KEY (meet, path));
+            CREATE INDEX IF NOT EXISTS documents_folder ON documents (meet, folder);
+            CREATE INDEX IF NOT EXISTS documents_nomefile ON documents (meet, nomefile);
+            CREATE INDEX IF NOT EXISTS documents_cod ON documents (meet, cod);''')
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        # a connection can't be shared with the processes forked by `convert_to_lenex`'s pool, each opens its own
+        if self._pid != os.getpid():
+            self._db, self._pid = sqlite3.connect(self.path), os.getpid()
+        return self._db
+
+    def __reduce__(self) -> tuple:
+        # sent to the workers of `convert_to_lenex`'s pool by path and meet: each opens the archive again
+        return Archive, (self.path, self.meet)
+
+    def close(self) -> None:
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+    def __enter__(self) -> 'Archive':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def put(self, path: str, data: bytes, nomefile: Optional[str] = None, cod: Optional[str] = None) -> bool:
+        """Stores a document at `path`, replacing the meet's previous one.
+
+        Returns:
+            bool: whether its content wasn't in the archive yet
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        new = self.db.execute('INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)',
+                              (digest, len(data), zlib.compress(data))).rowcount == 1
+        folder, _, name = path.rpartition('/')
+        self.db.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (self.meet, path, folder, name, nomefile, cod, digest))
+        return new
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    def _row(self, path: str) -> tuple:
+        row = self.db.execute('SELECT blobs.hash, blobs.size FROM documents JOIN blobs USING (hash) '
+                              'WHERE meet = ? AND path = ?', (self.meet, path)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f'{path} not in {self.path} ({self.meet})')
+        return row
+
+    def stat(self, path: str) -> tuple:
+        """Returns the version of the document, the sha256 of its content, and its size."""
+        return self._row(path)
+
+    def exists(self, path: str) -> bool:
+        return self.db.execute('SELECT 1 FROM documents WHERE meet = ? AND path = ?', (self.meet, path)).fetchone() is not None
+
+    def read(self, path: str) -> bytes:
+        row = self.db.execute('SELECT data FROM documents JOIN blobs USING (hash) WHERE meet = ? AND path = ?',
+                              (self.meet, path)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f'{path} not in {self.path} ({self.meet})')
+        return zlib.decompress(row[0])
+
+    def names(self, folder: str) -> list[str]:
+        """Returns the names of the documents in `folder`, sorted."""
+        return [name for name, in self.db.execute('SELECT name FROM documents WHERE meet = ? AND folder = ? ORDER BY name',
+                                                  (self.meet, folder))]
+
+    def digest(self, path: str) -> str:
+        return self._row(path)[0]
+
+    def paths(self, cod: Optional[str] = None) -> list[str]:
+        """Returns the paths of the meet's documents of kind `cod` (see `utils.FILE_TYPES`), of every document if `None`."""
+        if cod is None:
+            return [path for path, in self.db.execute('SELECT path FROM documents WHERE meet = ? ORDER BY path', (self.meet,))]
+        return [path for path, in self.db.execute('SELECT path FROM documents WHERE meet = ? AND cod = ? ORDER BY path',
+                                                  (self.meet, cod))]
+
+    def by_nomefile(self, nomefile: str) -> Optional[str]:
+        """Returns the path of the document Microplus publishes as `nomefile`, `None` if it isn't in the archive."""
+        row = self.db.execute('SELECT path FROM documents WHERE meet = ? AND nomefile = ?', (self.meet, nomefile)).fetchone()
+        return None if row is None else row[0]
+
+    def meets(self) -> list[str]:
+        return [meet for meet, in self.db.execute('SELECT DISTINCT meet FROM documents ORDER BY meet')]
+
+    def prune(self) -> int:
+        """Removes the blobs no document refers to anymore, returns how many were removed."""
+        removed = self.db.execute('DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM documents)').rowcount
+        self.db.commit()
+        return removed
+
+    def stats(self) -> dict:
+        documents, blobs, size, stored = self.db.execute(
+            'SELECT (SELECT COUNT(*) FROM documents WHERE meet = ?), COUNT(*), SUM(size), SUM(LENGTH(data)) FROM blobs',
+            (self.meet,)).fetchone()
+        return {'documents': documents, 'blobs': blobs, 'bytes': size or 0, 'stored_bytes': stored or 0}
+
+
+@metrics.stage('pack')
+def pack(root: str, path: str, meet: str = DEFAULT_MEET) -> dict:
+    """Packs a scraped data directory into the archive at `path`, replacing the meet's documents.
+
+    The `nomefile` of each document comes from the scrape manifest, its `cod` from the folder `scrape_data` put it in.
+
+    Returns:
+        dict: documents packed, and the ones whose content was already in the archive
+    """
+    nomefiles = {}
+    manifest = os.path.join(root, os.path.relpath(utils.MANIFEST_FILE, 'scraped_data'))
+    if os.path.isfile(manifest):
+        with open(manifest, 'r') as f:
+            nomefiles = {os.path.relpath(seen['path'], 'scraped_data'): nomefile
+                         for nomefile, seen in json.loads(f.read())['files'].items()}
+    packed, shared = 0, 0
+    with Archive(path, meet) as archive:
+        archive.db.execute('DELETE FROM documents WHERE meet = ?', (meet,))
+        for file in sorted(pathlib.Path(root).rglob('*')):
+            if not file.is_file():
+                continue
+            relative = file.relative_to(root).as_posix()
+            data = file.read_bytes()
+            metrics.count(files_read=1, bytes_read=len(data))
+            shared += not archive.put(relative, data, nomefiles.get(relative), FOLDER_CODES.get(relative.rpartition('/')[0]))
+            packed += 1
+        archive.commit()
+    return {'documents': packed, 'shared': shared}
+
+
+def unpack(path: str, root: str, meet: str = DEFAULT_MEET) -> int:
+    """Writes a meet's documents back as a scraped data directory, returns how many were written."""
+    with Archive(path, meet) as archive:
+        paths = archive.paths()
+        for relative in paths:
+            file = pathlib.Path(root, relative)
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_bytes(archive.read(relative))
+    return len(paths)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pack a meet's scraped data into a single-file archive, or unpack it.")
+    parser.add_argument('action', choices=['pack', 'unpack', 'info'])
+    parser.add_argument('archive', help='archive file')
+    parser.add_argument('--root', default='scraped_data', help='scraped data directory')
+    parser.add_argument('--meet', default=DEFAULT_MEET, help='name of the meet in the archive')
+    args = parser.parse_args()
+
+    if args.action == 'pack':
+        packed = pack(args.root, args.archive, args.meet)
+        print(f"{packed['documents']} documents packed, {packed['shared']} already in the archive")
+    elif args.action == 'unpack':
+        print(f'{unpack(args.archive, args.root, args.meet)} documents written in {args.root}')
+    with Archive(args.archive, args.meet) as archive:
+        stats = archive.stats()
+        print(f"{args.archive}: meets {', '.join(archive.meets())}; {args.meet}: {stats['documents']} documents, "
+              f"{stats['blobs']} distinct in the archive, {stats['bytes'] / 1e6:.2f} MB stored in {stats['stored_bytes'] / 1e6:.2f} MB")
@@ -0,0 +1,131 @@
+import argparse
+import json
+import pathlib
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import functions
+import metrics
+import points
+
+
+DEFAULT_ROOT = 'batch'
+DEFAULT_JOBS = 4
+
+
+def meet_slug(url: str) -> str:
+    """Returns the name of a meet's working directory, e.g. `NU_2022_07_28-08_04_Roma` for its `_web.php` url."""
+    name = url.rstrip('/').split('/')[-1].replace('_web.php', '')
+    return re.sub(r'[^\w.-]', '_', f"{url.split('//')[-1].split('.')[0]}_{name}")
+
+
+def process_meet(meet: dict, root: str = DEFAULT_ROOT, record_metrics: bool = False) -> dict:
+    """Scrapes and compiles a meet without asking anything, in its own working directory `root/<slug>`.
+
+    Args:
+        meet (dict): meet's options
+            Keys:
+                -`url`: competition's url
+                -`course`: pool length code, `SCM` or `LCM`
+                -`nation`: venue's nation code, optional for the venues in `utils.ITALIAN_VENUES`
+                -`format`: `lef` (default) or `lxf`
+                -`point_table`: key of the points table in `points.POINT_TABLES`, optional
+                -`low_memory`: build with `build_lenex`'s `low_memory`, for very large meets
+        root (str): directory holding the meets' working directories
+        record_metrics (bool): write the `metrics` report of the meet in its working directory, as `metrics.json`
+
+    Returns:
+        dict: meet's summary, with the path of the written file or the error, the timings of every stage and the peak
+            resident memory of the process, in bytes
+    """
+    workdir = pathlib.Path(root, meet_slug(meet['url'])).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    summary = {'url': meet['url'], 'workdir': str(workdir), 'path': None, 'error': None, 'timings': {}}
+    started = time.perf_counter()
+    if record_metrics:
+        metrics.enable()
+    try:
+        with functions.meet_directory(workdir):
+            functions.scrape_data(meet['url'])
+            summary['timings']['scrape'] = time.perf_counter() - started
+
+            stage = time.perf_counter()
+            data = functions.build_lenex(meet.get('point_table', points.DEFAULT_POINT_TABLE), 1, meet['course'],
+                                         meet.get('nation'), low_memory=meet.get('low_memory', False), interactive=False)
+            summary['timings']['build'] = time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            summary['path'] = str(workdir / functions.write_file(data, meet.get('format', 'lef')))
+            summary['timings']['write'] = time.perf_counter() - stage
+    except Exception as e:  # a broken meet must not stop the rest of the batch
+        summary['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        if record_metrics:
+            summary['metrics'] = str(workdir / 'metrics.json')
+            metrics.write_json(metrics.disable().report(), summary['metrics'])
+    summary['timings']['total'] = time.perf_counter() - started
+    summary['peak_memory'] = metrics.max_rss()
+    return summary
+
+
+def run_batch(meets: list[dict], jobs: int = DEFAULT_JOBS, root: str = DEFAULT_ROOT, record_metrics: bool = False) -> list[dict]:
+    """Processes every meet across a pool of `jobs` processes. From Python 3.11 each meet runs in a new process: the
+    memory of a meet is given back once it's done, and the peak memory in its summary is its own (before, it's the
+    peak of the process, which may have compiled other meets).
+
+    Returns:
+        list: meets' summaries, see `process_meet`, in the same order as `meets`
+    """
+    summaries: list = [None] * len(meets)
+    options = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=jobs, **options) as pool:
+        futures = {pool.submit(process_meet, meet, root, record_metrics): index for index, meet in enumerate(meets)}
+        for future in as_completed(futures):
+            summaries[futures[future]] = future.result()
+    pathlib.Path(root).mkdir(parents=True, exist_ok=True)
+    with open(f'{root}/summary.json', 'w') as f:
+        f.write(json.dumps(summaries, indent=2))
+    return summaries
+
+
+def print_summary(summaries: list[dict]) -> None:
+    for s in summaries:
+        t = s['timings']
+        stages = ' '.join(f'{stage} {t[stage]:.1f}s' for stage in ['scrape', 'build', 'write'] if stage in t)
+        print(f"{'ok' if s['error'] is None else 'FAILED':<6} {t['total']:7.1f}s  {stages:<36} "
+              f"{s['peak_memory'] / 1e6:6.0f} MB  {s['path'] or s['error']}")
+    failed = sum(s['error'] is not None for s in summaries)
+    print(f'{len(summaries) - failed}/{len(summaries)} meets compiled')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape and compile many meets unattended.')
+    parser.add_argument('file', nargs='?',
+                        help='JSON list of meets, e.g. [{"url": "...", "course": "LCM", "nation": "ITA", "format": "lxf"}]')
+    parser.add_argument('--meet', action='append', default=[], metavar='URL', help="competition's url, can be repeated")
+    parser.add_argument('--course', choices=['SCM', 'LCM'], help='default pool length code')
+    parser.add_argument('--nation', help="default venue's nation code")
+    parser.add_argument('--format', dest='output_format', choices=['lef', 'lxf'], default='lef')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='meets processed at the same time')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="directory holding the meets' working directories")
+    parser.add_argument('--metrics', action='store_true', help="write each meet's stage metrics in its working directory")
+    parser.add_argument('--low-memory', action='store_true',
+                        help='bound the memory of every build, spilling the clubs to disk (see build_lenex)')
+    args = parser.parse_args()
+
+    meets: list[dict] = []
+    if args.file:
+        with open(args.file, 'r') as f:
+            meets += json.loads(f.read())
+    meets += [{'url': url} for url in args.meet]
+    for meet in meets:  # the command line options are the defaults of every meet
+        meet.setdefault('course', args.course)
+        meet.setdefault('format', args.output_format)
+        meet.setdefault('low_memory', args.low_memory)
+        if args.nation is not None:
+            meet.setdefault('nation', args.nation)
+        if meet['course'] is None:
+            parser.error(f"missing course for {meet['url']}")
+    print_summary(run_batch(meets, args.jobs, args.root, args.metrics))
@@ -0,0 +1,126 @@
+"""Memory benchmark of the converted results, `model` objects against the previous nested dicts of strings.
+
+A `synthetic.Meet` is converted both ways in memory, the retained and the peak allocations of each conversion are
+measured with `tracemalloc`. Run from the repository root with:
+    python -m benchmarks.bench_model [--scale national] [--athletes N]
+"""
+import argparse
+import gc
+import tracemalloc
+
+import functions
+import model
+import utils
+from benchmarks import synthetic
+from swimtime import SwimTime
+
+
+def legacy_relay(entry: dict, pool_length: int, gender: str) -> dict:
+    splits, player_positions = [], []
+    for player in entry['Players']:
+        player_positions.append({
+            'number': str(len(player_positions) + 1), 'athleteid': player['PlaCod'], 'reactiontime': player['PlaRT'],
+            'lastname': player['PlaSurname'], 'firstname': player['PlaName'], 'gender': gender,
+            'birthdate': player['PlaBirth'],
+            'team': {'name': entry['TeamDescrIta'], 'shortname': entry['TeamDescrItaVis'], 'code': entry['PlaNat'],
+                     'nation': entry['PlaNat'], 'type': 'CLUB'}
+        })
+        player_splits = [utils.format_time(player[f'PlaInt{i}']) for i in range(1, 5) if player[f'PlaInt{i}'] != '']
+        splits = player_splits if len(splits) < 4 else splits + [utils.add_times(splits[-1], t, '00:00:00.00')
+                                                                 for t in player_splits]
+    return {'data': [{'distance': str(pool_length * index + pool_length), 'swimtime': splits[index - 1]}
+                     for index in range(len(splits))], 'player_positions': player_positions}
+
+
+def legacy_convert(meet: list, pool_length: int = 50) -> dict:
+    """Converts the meet into the dicts `get_heats` and `convert_to_lenex` used to build."""
+    sessions, athletes, relays = [], [], []
+    for eventid, (event, heat_entries, startlist) in enumerate(meet, 1):
+        entry_times = {e['PlaCod']: utils.format_time(e['MemIscr']) for e in startlist}
+        heats, times = {}, []
+        agegroup = {'id': f'10{eventid}', 'age_costraints': {'agemax': '-1', 'agemin': '-1'}, 'results': []}
+        for result_n, entry in enumerate(heat_entries['data'], 1):
+            heatid = f'{entry["b"]}000{eventid}'
+            swimtime = utils.format_time(entry['MemPrest'])
+            result = {'eventid': str(eventid), 'agegroupid': agegroup['id'], 'place': entry['PlaCls'],
+                      'lane': entry['PlaLane'], 'heat': str(entry['b']), 'heatid': heatid, 'swimtime': swimtime,
+                      'reactiontime': ''}
+            if 'Players' in entry:
+                splits = legacy_relay(entry, pool_length, event['c0'][-1])
+                athletes += [{'athlete_infos': a} for a in splits['player_positions']]
+                relays.append({'relay_infos': {'gender': event['c0'][-1], 'team': {
+                    'name': entry['TeamDescrIta'], 'code': entry['PlaTeamCod'], 'nation': entry['PlaNat'], 'type': 'CLUB'}},
+                    'result': result | {'resultid': f'20{eventid}{result_n}', 'splits': splits}})
+            else:
+                splits = []
+                for index, time in enumerate(entry['MemFields'][1:]):
+                    if time['V'] == '':
+                        break
+                    splits.append({'distance': str(pool_length * index + pool_length), 'swimtime': utils.format_time(time['V'])})
+                athletes.append({
+                    'athlete_infos': {'athleteid': entry['PlaCod'], 'lastname': entry['PlaSurname'],
+                                      'firstname': entry['PlaName'], 'gender': event['c0'][-1], 'birthdate': entry['PlaBirth'],
+                                      'team': {'name': entry['TeamDescrIta'], 'shortname': entry['TeamDescrItaVis'],
+                                               'code': entry['PlaNat'], 'nation': entry['PlaNat'], 'type': 'CLUB'}},
+                    'entry': {'eventid': str(eventid), 'entrytime': entry_times.get(entry['PlaCod']), 'heat': str(entry['b']),
+                              'lane': entry['PlaLane'], 'meetinfo': heat_entries['Heat']['UffDate']},
+                    'result': result | {'resultid': f'20{eventid}000{result_n}', 'points': '', 'splits': splits}})
+            heats.setdefault(entry['b'], {'daytime': heat_entries['Heat']['UffTime'], 'heatid': heatid, 'number': entry['b']})
+            times.append(f'20{eventid}{result_n}')
+        agegroup['results'] = [{'order': str(i), 'place': str(i), 'resultid': r} for i, r in enumerate(times, 1)]
+        sessions.append({'agegroup': agegroup, 'heats': heats})
+
+    clubs = {}
+    for entry in athletes:
+        infos = entry['athlete_infos']
+        club = clubs.setdefault(infos['team']['name'], {'infos': infos['team'], 'athletes': {}, 'relays': []})
+        del infos['team']
+        athlete = club['athletes'].setdefault(infos['athleteid'], {'athlete_infos': infos})
+        if 'entry' in entry:
+            athlete.setdefault('entries', []).append(entry['entry'])
+            athlete.setdefault('results', []).append(entry['result'])
+    for entry in relays:
+        clubs[entry['relay_infos']['team']['name']]['relays'].append(entry)
+    return {'sessions': sessions, 'clubs': clubs}
+
+
+def model_convert(meet: list, pool_length: int = 50) -> dict:
+    """Converts the meet with `functions.convert_heats` and `model.merge_clubs`."""
+    events = []
+    for eventid, (event, heat_entries, startlist) in enumerate(meet, 1):
+        entry_times = {}
+        for e in startlist:
+            entry_times.setdefault(e['PlaCod'], model.encode_time(SwimTime.parse(e['MemIscr'])))
+        events.append(functions.convert_heats(heat_entries, entry_times, event, eventid, pool_length))
+    return {'sessions': [{'agegroup': e.agegroup, 'heats': e.heats} for e in events], 'clubs': model.merge_clubs(events)}
+
+
+def measure(convert, meet: list, pool_length: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    converted = convert(meet, pool_length)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'retained': retained, 'peak': peak, 'clubs': len(converted['clubs'])}
+
+
+def bench(scale: str = 'national', **overrides) -> dict:
+    """Measures both conversions of a `synthetic.Meet` of the given scale, `overrides` replacing the scale's values."""
+    synthetic_meet = synthetic.Meet(scale, **overrides)
+    meet = list(synthetic_meet.events())
+    return {'events': len(meet), 'results': sum(len(e[1]['data']) for e in meet),
+            'dicts': measure(legacy_convert, meet, synthetic_meet.pool_length),
+            'model': measure(model_convert, meet, synthetic_meet.pool_length)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=list(synthetic.SCALES.keys()), default='national')
+    parser.add_argument('--athletes', type=int, help="athletes of the meet, the scale's number if missing")
+    args = parser.parse_args()
+    r = bench(args.scale, **({} if args.athletes is None else {'athletes': args.athletes}))
+    print(f"{r['events']} events, {r['results']} results, {r['model']['clubs']} clubs")
+    for name in ['dicts', 'model']:
+        print(f"{name:<6} retained {r[name]['retained'] / 2**20:7.1f} MB   peak {r[name]['peak'] / 2**20:7.1f} MB")
+    print(f"model/dicts: retained x{r['model']['retained'] / r['dicts']['retained']:.2f}, "
+          f"peak x{r['model']['peak'] / r['dicts']['peak']:.2f}")
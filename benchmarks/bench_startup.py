@@ -0,0 +1,70 @@
+"""Startup benchmark: import time of the entry points, each in a fresh interpreter, against a budget.
+
+Heavy dependencies are only imported on the paths that use them (`requests` to download, `inquirer` to ask), a build
+that neither downloads nor asks must not load them. Run from the repository root with:
+    python -m benchmarks.bench_startup [--repeat N]   # exits with 1 if an entry point is over budget, or loads one of them
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# milliseconds to import each entry point, interpreter startup excluded
+BUDGETS = {
+    'functions': 30,
+    'main': 40,
+    'batch': 50,
+    'pipeline': 30,
+    'watch': 30,
+    'merge': 35,
+    'lenex_reader': 20,
+    'archive': 25,
+}
+# loaded by none of the entry points: they're imported where they're used
+LAZY_MODULES = ('requests', 'urllib3', 'inquirer', 'blessed', 'readchar', 'bs4', 'xml.dom.minidom')
+DEFAULT_REPEAT = 5
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - started, 'lazy': [m for m in {lazy!r} if m in sys.modules]}}))
+'''
+
+
+def measure(module: str, repeat: int = DEFAULT_REPEAT) -> dict:
+    """Imports `module` in `repeat` new interpreters, after a first run compiling the bytecode.
+
+    Returns:
+        dict: best import time and best process time (interpreter startup included), in seconds, and the lazy modules
+            the import loaded
+    """
+    env = {name: value for name, value in os.environ.items() if name != 'PYTHONDONTWRITEBYTECODE'}
+    command = [sys.executable, '-c', CHILD.format(module=module, lazy=LAZY_MODULES)]
+    subprocess.run(command, env=env, check=True, capture_output=True)
+    seconds, process = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = json.loads(subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout)
+        process.append(time.perf_counter() - started)
+        seconds.append(output['seconds'])
+    return {'seconds': min(seconds), 'process': min(process), 'lazy': output['lazy']}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+    failed = []
+    for module, budget in BUDGETS.items():
+        r = measure(module, args.repeat)
+        over = r['seconds'] * 1000 > budget
+        print(f"{module:<14} import {r['seconds'] * 1000:6.1f} ms (budget {budget:3d} ms)   process {r['process'] * 1000:6.1f} ms"
+              f"{'   OVER BUDGET' if over else ''}{'   loads ' + ', '.join(r['lazy']) if r['lazy'] else ''}")
+        if over or r['lazy']:
+            failed.append(module)
+    if failed:
+        print(f"over budget: {', '.join(failed)}")
+        sys.exit(1)
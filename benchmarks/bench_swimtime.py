@@ -0,0 +1,69 @@
+"""Micro-benchmark of the swim time helpers, `SwimTime` against the previous `strptime` based implementation.
+
+Run from the repository root with:
+    python -m benchmarks.bench_swimtime
+"""
+import random
+import timeit
+from datetime import datetime
+
+import utils
+
+
+def legacy_format_time(time: str) -> str:
+    if '*' in time:
+        time = time.replace('*', '')
+    if len(time) < 4:
+        return "NT"
+    if len(time) > 5:
+        return datetime.strptime(time, "%M'%S.%f").strftime("%H:%M:%S.%f")[:-4]
+    return datetime.strptime(time, "%S.%f").strftime("%H:%M:%S.%f")[:-4]
+
+
+def legacy_add_times(t1, t2, time_zero) -> str:
+    t1 = datetime.strptime(t1, '%H:%M:%S.%f')
+    t2 = datetime.strptime(t2, '%H:%M:%S.%f')
+    time_zero = datetime.strptime(time_zero, '%H:%M:%S.%f')
+    result = str((t2 - time_zero + t1).time())
+    if len(result) == 8:
+        result = datetime.strptime(result, "%H:%M:%S").strftime("%H:%M:%S.%f")
+    return result[:-4]
+
+
+def legacy_time_to_timedelta(t):
+    return datetime.strptime(t, "%H:%M:%S.%f") - datetime(1900, 1, 1)
+
+
+def sample_times(n: int, seed: int = 0) -> list[str]:
+    r = random.Random(seed)
+    times = []
+    for _ in range(n):
+        cs = r.randint(2000, 90000)
+        minutes, rest = divmod(cs, 6000)
+        times.append(f"{minutes}'{rest // 100:02d}.{rest % 100:02d}" if minutes else f'{rest // 100:02d}.{rest % 100:02d}')
+    return times
+
+
+def bench(n: int = 20000, repeat: int = 5) -> dict:
+    raw = sample_times(n)
+    lenex = [legacy_format_time(t) for t in raw]
+    assert lenex == [utils.format_time(t) for t in raw]
+    cases = {
+        'format_time': (lambda: [legacy_format_time(t) for t in raw],
+                        lambda: [utils.format_time(t) for t in raw]),
+        'add_times': (lambda: [legacy_add_times(a, b, '00:00:00.00') for a, b in zip(lenex, lenex[1:])],
+                      lambda: [utils.add_times(a, b, '00:00:00.00') for a, b in zip(lenex, lenex[1:])]),
+        'time_to_timedelta': (lambda: [legacy_time_to_timedelta(t) for t in lenex],
+                              lambda: [utils.time_to_timedelta(t) for t in lenex]),
+    }
+    results = {}
+    for name, (legacy, current) in cases.items():
+        legacy_s = min(timeit.repeat(legacy, number=1, repeat=repeat))
+        current_s = min(timeit.repeat(current, number=1, repeat=repeat))
+        results[name] = {'legacy_s': legacy_s, 'current_s': current_s, 'speedup': legacy_s / current_s}
+    return results
+
+
+if __name__ == '__main__':
+    for name, r in bench().items():
+        print(f"{name:<18} strptime {r['legacy_s'] * 1000:8.1f} ms   SwimTime {r['current_s'] * 1000:8.1f} ms   x{r['speedup']:.1f}")
@@ -0,0 +1,166 @@
+"""Benchmark suite: times scraping, conversion and serialization of a synthetic meet, against stored baselines.
+
+Scraping downloads the meet from a local mock Microplus server: `scrape` without the HTTP cache, `scrape_revalidate`
+through a warm cache (every file answered `304 Not Modified`), `scrape_offline` from the cache alone. Conversion is
+`build_lenex` (JSON parsing included, without the event cache), serialization is `write_file`. Each stage keeps the
+best of `--repeat` runs.
+
+    python -m benchmarks.suite --scale melbourne --save   # record the baselines of this machine
+    python -m benchmarks.suite --scale melbourne          # compare, exits with 1 on a regression
+
+Baselines only make sense on the machine that recorded them.
+"""
+import argparse
+import functools
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable
+
+import functions
+from benchmarks import synthetic
+
+
+BASELINES_FILE = 'benchmarks/baselines.json'
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25  # a stage regresses when it's more than 25% slower than its baseline
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+
+    def log_message(self, *_) -> None:
+        pass
+
+
+class MicroplusHandler(QuietHandler):
+    """Serves files the way the Microplus export endpoints do: with an `ETag`, answering `304 Not Modified` to a
+    matching `If-None-Match`, gzip-compressed for the clients accepting it."""
+
+    def do_GET(self) -> None:
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compressed:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(directory: str) -> http.server.ThreadingHTTPServer:
+    """Serves `directory` on a free local port, from a daemon thread."""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(MicroplusHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def best_of(repeat: int, stage: Callable[[], object], setup: Callable[[], None] = lambda: None) -> float:
+    """Returns the shortest of `repeat` runs of `stage`, in seconds, `setup` runs untimed before each of them."""
+    times = []
+    for _ in range(repeat):
+        setup()
+        started = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def run(scale: str, repeat: int = DEFAULT_REPEAT, seed: int = 0) -> dict[str, float]:
+    """Runs every stage on a fresh synthetic meet of the given scale.
+
+    Returns:
+        dict: stage -> seconds
+    """
+    meet = synthetic.Meet(scale, seed)
+    course, nation = meet.config['course'], 'ITA'
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        server = serve(f'{root}/server')
+        path = meet.write_export(f'{root}/server')
+        url = f'http://127.0.0.1:{server.server_address[1]}{path}'
+        pathlib.Path(root, 'work').mkdir()
+        os.chdir(pathlib.Path(root, 'work'))
+        try:
+            results = {'scrape': best_of(repeat, lambda: functions.scrape_data(url, force=True, http_cache=False))}
+            functions.scrape_data(url, force=True)  # warms the HTTP cache
+            results['scrape_revalidate'] = best_of(repeat, lambda: functions.scrape_data(url, force=True))
+            results['scrape_offline'] = best_of(repeat, lambda: functions.scrape_data(url, force=True, offline=True))
+            functions.scraped.clear()
+            results['convert'] = best_of(repeat, lambda: functions.build_lenex(course=course, nation=nation, cache=False),
+                                         functions.scraped.clear)
+            data = functions.build_lenex(course=course, nation=nation, cache=False)
+            for output_format in ['lef', 'lxf']:
+                results[f'serialize_{output_format}'] = best_of(repeat, lambda: functions.write_file(data, output_format))
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    """Prints every stage against its baseline, returns the stages that regressed."""
+    regressions = []
+    for stage, seconds in results.items():
+        reference = baseline.get(stage)
+        if reference is None:
+            print(f'{stage:<18} {seconds * 1000:9.1f} ms   (no baseline)')
+            continue
+        regressed = seconds > reference * (1 + tolerance)
+        print(f'{stage:<18} {seconds * 1000:9.1f} ms   baseline {reference * 1000:9.1f} ms   '
+              f'{(seconds / reference - 1):+.0%}{"   REGRESSION" if regressed else ""}')
+        if regressed:
+            regressions.append(stage)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages on a synthetic meet.')
+    parser.add_argument('--scale', choices=list(synthetic.SCALES.keys()), default='session')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--baselines', default=BASELINES_FILE)
+    parser.add_argument('--save', action='store_true', help="store this run as the scale's baseline")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.isfile(args.baselines):
+        with open(args.baselines, 'r') as f:
+            baselines = json.loads(f.read())
+
+    results = run(args.scale, args.repeat)
+    machine = f'{platform.node()} {platform.machine()} python {platform.python_version()}'
+    baseline = baselines.get(args.scale, {})
+    if baseline and baseline.get('machine') != machine:
+        print(f"warning: baseline recorded on {baseline.get('machine')}, this is {machine}")
+    regressions = compare(results, baseline.get('stages', {}), args.tolerance)
+
+    if args.save:
+        baselines[args.scale] = {'machine': machine, 'recorded': time.strftime('%Y-%m-%d'), 'stages': results}
+        with open(args.baselines, 'w') as f:
+            f.write(json.dumps(baselines, indent=4))
+        print(f'baseline saved in {args.baselines}')
+    elif regressions:
+        sys.exit(1)
@@ -0,0 +1,246 @@
+"""Synthetic Microplus exports, to measure the tool without a live competition.
+
+A meet is generated from a seed, so the same scale always gives the same files. It can be written as a `scraped_data/`
+tree, as `functions.scrape_data` leaves it, or as a Microplus export (`Contatori.json`, `CounterGenerale.json` and the
+files they list) to be served by a local mock server.
+
+    python -m benchmarks.synthetic <directory> [--scale melbourne] [--export]
+"""
+import argparse
+import json
+import pathlib
+import random
+from typing import Iterator
+from urllib.parse import quote
+
+import utils
+
+
+# `session`: a single session; `national`: an italian championship with junior categories;
+# `melbourne`: sized after the 2022 short course world championships (examples/MELBOURNE.lef)
+SCALES = {
+    'session': {
+        'name': 'Synthetic Session', 'place': 'Roma, Foro Italico', 'course': 'LCM', 'sessions': 1,
+        'categories': ['ASF', 'ASM'], 'races': ['50m Freestyle', '100m Backstroke', '200m Breaststroke', '100m Butterfly'],
+        'relays': ['4 x 100m Freestyle'], 'athletes': 120, 'clubs': 16, 'entries': 24, 'semifinals': [], 'finals': False,
+    },
+    'national': {
+        'name': 'Synthetic National Championships', 'place': 'Riccione, Stadio del Nuoto', 'course': 'LCM', 'sessions': 8,
+        'categories': ['ASF', 'ASM', 'CAF', 'CAM', 'JUF', 'JUM', 'RAF', 'RAM', '10F', '10M'],
+        'races': ['50m Freestyle', '100m Freestyle', '200m Freestyle', '400m Freestyle', '100m Backstroke',
+                  '100m Breaststroke', '100m Butterfly', '200m Individual Medley'],
+        'relays': ['4 x 100m Freestyle', '4 x 100 m Medley'], 'athletes': 1500, 'clubs': 120, 'entries': 40,
+        'semifinals': [], 'finals': True,
+    },
+    'melbourne': {
+        'name': 'Synthetic World Championships (25m)', 'place': 'Melbourne, Melbourne Sports and Aquatic Centre',
+        'course': 'SCM', 'sessions': 12, 'categories': ['ASF', 'ASM'],
+        'races': ['50m Freestyle', '100m Freestyle', '200m Freestyle', '400m Freestyle', '800m Freestyle',
+                  '1500m Freestyle', '50m Backstroke', '100m Backstroke', '200m Backstroke', '50m Breaststroke',
+                  '100m Breaststroke', '200m Breaststroke', '50m Butterfly', '100m Butterfly', '200m Butterfly',
+                  '100m Individual Medley', '200m Individual Medley', '400m Individual Medley'],
+        'relays': ['4 x 50 m Freestyle', '4 x 100m Freestyle', '4 x 200m Freestyle', '4 x 100 m Medley'],
+        'athletes': 730, 'clubs': 160, 'entries': 48,
+        'semifinals': ['50m Freestyle', '100m Freestyle', '50m Backstroke', '100m Backstroke', '50m Breaststroke',
+                       '100m Breaststroke', '50m Butterfly', '100m Butterfly', '100m Individual Medley'],
+        'finals': True,
+    },
+}
+
+PACE = {'FREE': 50, 'BACK': 56, 'BREAST': 62, 'FLY': 54, 'MEDLEY': 58}  # centiseconds per meter in a 100m race
+SURNAMES = ['Rossi', 'Müller', 'Martin', 'García', 'Smith', 'Kowalski', 'Novák', 'Dubois', 'Larsen', "D'Angelo",
+            'Tanaka', 'Silva', 'Ivanova', 'Nagy', 'Jensen', 'Popescu', 'Ferrari', 'Schmidt', 'López', 'Brown']
+NAMES = ['Anna', 'Luca', 'Marie', 'José', 'Sofia', 'Björn', 'Chloé', 'Mateo', 'Emma', 'Noah', 'Zoë', 'Jan']
+NATIONS = ['ITA', 'AUS', 'USA', 'FRA', 'GER', 'HUN', 'JPN', 'CAN', 'GBR', 'NED', 'SWE', 'BRA', 'CHN', 'POL', 'ESP']
+LANES = 8
+
+
+def microplus_time(cs: int) -> str:
+    """Formats centiseconds as a Microplus time, `M'SS.ff` or `SS.ff`."""
+    minutes, rest = divmod(cs, 6000)
+    return f"{minutes}'{rest // 100:02d}.{rest % 100:02d}" if minutes else f'{rest // 100:02d}.{rest % 100:02d}'
+
+
+def birth_year(category: str, r: random.Random) -> int:
+    if category[:2].isdigit():
+        return 2000 + int(category[:2])
+    return {'CA': r.randint(2003, 2005), 'JU': r.randint(2006, 2008), 'RA': r.randint(2009, 2011)}.get(
+        category[:2], r.randint(1990, 2004))
+
+
+class Meet:
+    """A synthetic meet, generated in memory as Microplus documents.
+
+    Args:
+        scale (str): key of `SCALES`
+        seed (int): random seed
+        **overrides: values replacing the scale's ones, e.g. `athletes=5000`
+    """
+
+    def __init__(self, scale: str = 'session', seed: int = 0, **overrides) -> None:
+        self.config = SCALES[scale] | overrides
+        self.r = random.Random(seed)
+        self.pool_length = 50 if self.config['course'] == 'LCM' else 25
+        self.files: dict[str, tuple[str, dict]] = {}  # jsonfilename -> (Contatori `cod`, document)
+        self.clubs = [(f"{self.r.choice(['Aquatic', 'Nuoto', 'Swim Team', 'Sport'])} {i:03d}", NATIONS[i % len(NATIONS)])
+                      for i in range(self.config['clubs'])]
+        self.athletes: dict[str, list[dict]] = {c: [] for c in self.config['categories']}
+        weights = [1 / (i + 1) for i in range(len(self.clubs))]  # a few large clubs, many small ones
+        for i in range(self.config['athletes']):
+            category = self.config['categories'][i % len(self.config['categories'])]
+            self.athletes[category].append({
+                'PlaCod': f'{100000 + i}', 'PlaSurname': quote(self.r.choice(SURNAMES)).upper(),
+                'PlaName': quote(self.r.choice(NAMES)), 'PlaBirth': str(birth_year(category, self.r)),
+                'club': self.r.choices(self.clubs, weights)[0], 'talent': self.r.uniform(1.0, 1.15)
+            })
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Spreads the events over the sessions: prelims in the morning, semifinals and finals in the evening."""
+        sessions: list[list[dict]] = [[] for _ in range(self.config['sessions'])]
+        days = max(1, self.config['sessions'] // 2)
+        programs = [(c, race) for race in self.config['races'] + self.config['relays'] for c in self.config['categories']]
+        for n, (category, race) in enumerate(programs):
+            day = n * days // len(programs)
+            morning = min(2 * day, len(sessions) - 1)
+            evening = min(2 * day + 1, len(sessions) - 1)
+            sessions[morning].append({'c0': category, 'd_en': race, 'c2': '001'})
+            if race in self.config['semifinals']:
+                sessions[evening].append({'c0': category, 'd_en': race, 'c2': '003'})
+            if self.config['finals']:
+                sessions[evening].append({'c0': category, 'd_en': race, 'c2': '005'})
+
+        for session_n, session in enumerate(sessions, 1):
+            date = f'{(session_n - 1) // 2 + 1:02d}/08/2022'
+            session.sort(key=lambda e: e['c2'])  # prelims first, when prelims and finals share the session
+            for index, event in enumerate(session):
+                event['h'] = f'{(9 if session_n % 2 else 17) + index * 10 // 60:02d}:{index * 10 % 60:02d}'
+                self._event(event, date)
+            filename = f'ScheduleByDate_{session_n}.JSON'
+            self.files[filename] = ('SCH_D', {'jsonfilename': filename, 'e': session})
+
+    def _time(self, race: str, category: str, talent: float) -> int:
+        distance, stroke = race.split('m')[0].replace('4 x', '').strip(), race.split('m')[1].strip()
+        pace = PACE[utils.LENEX_STROKES[stroke]] * (1.1 if category[-1] == 'F' else 1.0) * (1.08 if category[:2] != 'AS' else 1.0)
+        pace *= {50: 0.92, 100: 1.0, 200: 1.08, 400: 1.13, 800: 1.17, 1500: 1.19}[int(distance)]
+        return int(int(distance) * pace * talent * self.r.uniform(0.99, 1.03))
+
+    def _event(self, event: dict, date: str) -> None:
+        category, race, round = event['c0'], event['d_en'], event['c2']
+        relay = 'x' in race
+        size = {'001': self.config['entries'], '003': 16, '005': 8}[round]
+        if relay:
+            clubs = [club for club in self.clubs if len(self._members(club, category)) >= 4] or self.clubs
+            entries = self.r.sample(clubs, min(size // 2 if round == '001' else size, len(clubs)))
+        else:
+            pool = self.athletes[category]
+            entries = sorted(self.r.sample(pool, min(size, len(pool))), key=lambda a: a['talent'])
+        swims, startlist = [], []
+        for entry in entries:
+            status = self.r.random()
+            status = 'DSQ' if status < 0.02 else ('DNS' if status < 0.04 else '')
+            if relay:
+                swims.append(self._relay(entry, category, race, status))
+                continue
+            total = self._time(race, category, entry['talent'])
+            distance = int(race.split('m')[0])
+            splits = [{'V': microplus_time(total * (k + 1) * self.pool_length // distance)}
+                      for k in range(distance // self.pool_length)]
+            swims.append((total, {
+                'PlaCod': entry['PlaCod'], 'PlaSurname': entry['PlaSurname'], 'PlaName': entry['PlaName'],
+                'PlaBirth': entry['PlaBirth'], 'TeamDescrIta': quote(entry['club'][0]), 'TeamDescrItaVis': entry['club'][0][:10],
+                'PlaNat': entry['club'][1], 'PlaCls': status, 'MemPrest': '' if status == 'DNS' else microplus_time(total),
+                'MemFields': [{'V': ''}] + ([] if status == 'DNS' else splits) + [{'V': ''}]
+            }))
+            startlist.append({'PlaCod': entry['PlaCod'], 'MemIscr': microplus_time(int(total * self.r.uniform(0.98, 1.04)))})
+
+        # the swimmers are seeded by entry time, the results list the ranked swims first, as in Microplus' exports
+        for i, (_, swim) in enumerate(swims):
+            swim['b'], swim['PlaLane'] = str(i // LANES + 1), str(i % LANES + 1)
+        data = [swim for _, swim in sorted(swims, key=lambda s: (s[1]['PlaCls'] != '', s[0]))]
+        for place, swim in enumerate(data, 1):
+            if swim['PlaCls'] == '':
+                swim['PlaCls'] = str(place)
+
+        code = utils.RACE_CODES[race]
+        results = f'NU{category}{code}CLAS{round[::2]} 001.JSON'
+        self.files[results] = ('CGR1', {
+            'jsonfilename': results,
+            'Export': {'ExpName': self.config['name'], 'ExpDescr': f"{self.config['name']} - synthetic export"},
+            'Event': {'Place': self.config['place']}, 'Heat': {'UffDate': date, 'UffTime': event['h']},
+            'Category': {'Cod': category}, 'Round': {'Cod': round}, 'data': data
+        })
+        startlist_file = f'NU{category}{code}STAR{round[::2]} 001.JSON'
+        self.files[startlist_file] = ('STL1', {'jsonfilename': startlist_file, 'data': startlist})
+
+    def _members(self, club: tuple[str, str], category: str) -> list[dict]:
+        """Returns the athletes of a club that can swim a relay of `category`."""
+        return [a for a in self.athletes[category] if a['club'] == club]
+
+    def _relay(self, club: tuple[str, str], category: str, race: str, status: str) -> tuple[int, dict]:
+        members = self._members(club, category)
+        legs = self.r.sample(members, 4) if len(members) >= 4 else [self.r.choice(self.athletes[category]) for _ in range(4)]
+        leg = race.replace('4 x', '').strip()
+        leg_distance = int(leg.split('m')[0])
+        n_splits = min(4, leg_distance // self.pool_length)
+        players, total = [], 0
+        for athlete in legs:
+            leg_time = self._time(f"{leg_distance}m {leg.split('m')[1].strip()}", category, athlete['talent'])
+            total += leg_time
+            players.append({
+                'PlaCod': athlete['PlaCod'], 'PlaRT': f'0.{self.r.randint(55, 75)}', 'PlaSurname': athlete['PlaSurname'],
+                'PlaName': athlete['PlaName'], 'PlaBirth': athlete['PlaBirth']
+            } | {f'PlaInt{k}': microplus_time(leg_time * k // n_splits) if k <= n_splits else '' for k in range(1, 5)})
+        return total, {
+            'PlaCod': f'R{quote(club[0])}', 'TeamDescrIta': quote(club[0]), 'TeamDescrItaVis': club[0][:10],
+            'PlaNat': club[1], 'PlaTeamCod': club[1], 'PlaCls': status,
+            'MemPrest': '' if status == 'DNS' else microplus_time(total), 'Players': players
+        }
+
+    def events(self) -> Iterator[tuple[dict, dict, list]]:
+        """Yields the `(event, results file, startlist)` of every event, in schedule order."""
+        for filename, (cod, document) in self.files.items():
+            if cod != 'SCH_D':
+                continue
+            for event in document['e']:
+                prefix = f"NU{event['c0']}{utils.RACE_CODES[event['d_en']]}"
+                suffix = f"{event['c2'][::2]} 001.JSON"
+                yield event, self.files[f'{prefix}CLAS{suffix}'][1], self.files[f'{prefix}STAR{suffix}'][1]['data']
+
+    def write_scraped_data(self, root: str = '.') -> None:
+        """Writes the meet as `scrape_data` stores it, in `<root>/scraped_data/`."""
+        for filename, (cod, document) in self.files.items():
+            folder = pathlib.Path(root, 'scraped_data', utils.FILE_TYPES[cod])
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / filename).write_text(json.dumps(document))
+
+    def write_export(self, root: str, slug: str = 'NU_synthetic', counter_generale: int = 1) -> str:
+        """Writes the meet as a Microplus export in `<root>/export/<slug>/NU/`.
+
+        Returns:
+            str: the competition's url, once `root` is served over http (e.g. `http://127.0.0.1:8000/<slug>_web.php`)
+        """
+        folder = pathlib.Path(root, 'export', slug, 'NU')
+        folder.mkdir(parents=True, exist_ok=True)
+        for filename, (_, document) in self.files.items():
+            (folder / filename).write_text(json.dumps(document))
+        (folder / 'Contatori.json').write_text(json.dumps({'contatori': [
+            {'nomefile': filename, 'counter': str(counter_generale), 'cod': cod} for filename, (cod, _) in self.files.items()
+        ]}))
+        (folder / 'CounterGenerale.json').write_text(f'{counter_generale}\r\n')
+        return f'/{slug}_web.php'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic Microplus meet.')
+    parser.add_argument('directory')
+    parser.add_argument('--scale', choices=list(SCALES.keys()), default='session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--export', action='store_true', help='write a Microplus export instead of a scraped_data tree')
+    args = parser.parse_args()
+    meet = Meet(args.scale, args.seed)
+    if args.export:
+        print(f'serve {args.directory} over http, competition url: http://<host>{meet.write_export(args.directory)}')
+    else:
+        meet.write_scraped_data(args.directory)
+    print(f'{len(meet.files)} files written')
@@ -0,0 +1,69 @@
+import pickle
+import sqlite3
+from typing import Iterator
+
+import metrics
+import model
+
+
+class ClubStore:
+    """The clubs of a meet spilled to a temporary SQLite database, built event by event and read back one club at a time.
+
+    A drop-in for `model.merge_clubs`' list in the data written by `write_lenex`: iterating it yields the same clubs,
+    in the same order, but only the club being written is in memory. Each event adds a row per club, with the club's
+    athletes and relays of the event; reading a club back merges its rows in the order they were added, so its athletes
+    come in order of first appearance. The database is private to this process and deleted when the store is closed.
+    """
+
+    def __init__(self) -> None:
+        self.teams = model.Teams()
+        # an empty file name is a temporary on-disk database: only its page cache is held in memory
+        self.db = sqlite3.connect('')
+        self.db.executescript('''
+            CREATE TABLE swims (seq INTEGER PRIMARY KEY, club INTEGER, records BLOB);
+            CREATE INDEX swims_club ON swims (club, seq);''')
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> 'ClubStore':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @metrics.stage('spill')
+    def add(self, event: model.EventResults) -> None:
+        """Stores the athletes and relays of an event, moving their `team` ids onto the meet's teams, as `merge_clubs`."""
+        records: dict[int, tuple[list, list]] = {}  # team id -> club's athletes and relays in the event
+        for athlete in event.athletes:
+            team = event.teams[athlete.team]
+            athlete.team = self.teams.intern(team.name, team.nation, team.type, team.code)
+            records.setdefault(athlete.team, ([], []))[0].append(athlete)
+        for relay in event.relays:
+            team = event.teams[relay.team]
+            relay.team = self.teams.intern(team.name, team.nation, team.type, team.code)
+            records.setdefault(relay.team, ([], []))[1].append(relay)
+        self.db.executemany('INSERT INTO swims (club, records) VALUES (?, ?)',
+                            [(team, pickle.dumps(club, pickle.HIGHEST_PROTOCOL)) for team, club in records.items()])
+
+    def club(self, team: model.Team) -> model.Club:
+        """Reads a club back, the records of an athlete merged as in `merge_clubs`."""
+        club = model.Club(team)
+        for records, in self.db.execute('SELECT records FROM swims WHERE club = ? ORDER BY seq', (team.id,)):
+            athletes, relays = pickle.loads(records)
+            for athlete in athletes:
+                first = club.athletes.get(athlete.athleteid)
+                if first is None:
+                    club.athletes[athlete.athleteid] = athlete
+                else:
+                    first.add_swims(athlete)
+            club.relays += relays
+        return club
+
+    def __iter__(self) -> Iterator[model.Club]:
+        for team in self.teams:
+            yield self.club(team)
+
+    def __len__(self) -> int:
+        return len(self.teams)
@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator, Optional
+from urllib.parse import urlparse
+
+import metrics
+from http_cache import HttpCache
+
+if TYPE_CHECKING:  # imported by the first `Downloader`, a build that doesn't download never loads `requests`
+    import requests
+
+
+DEFAULT_WORKERS = 8
+DEFAULT_HOST_LIMIT = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class Downloader:
+    """Concurrent `GET` engine sharing one keep-alive session between its worker threads.
+
+    Args:
+        workers (int): size of the thread pool
+        host_limit (int): max number of requests in flight towards the same host
+        retries (int): retries on connection errors and on `RETRY_STATUSES` responses
+        backoff (float): backoff factor between retries, in seconds (0.5 -> 0.5s, 1s, 2s, ...)
+        rate (float): max number of requests started per second, unlimited if `None`
+        cache (HttpCache): cache the responses go through, see `http_cache.HttpCache`
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, host_limit: int = DEFAULT_HOST_LIMIT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF, rate: Optional[float] = None,
+                 cache: Optional[HttpCache] = None) -> None:
+        self.workers = workers
+        self.host_limit = host_limit
+        self.rate = rate
+        self.cache = cache
+        self._next_request = 0.0
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=workers,
+            pool_maxsize=max(workers, host_limit),
+            max_retries=Retry(total=retries, backoff_factor=backoff,
+                              status_forcelist=RETRY_STATUSES, allowed_methods=['GET'])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.files = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    def __enter__(self) -> 'Downloader':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.host_limit)
+            return self._host_slots[host]
+
+    def _throttle(self) -> None:
+        """Waits for the next request slot allowed by `rate`."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request)
+            self._next_request = slot + 1 / self.rate
+        time.sleep(slot - now)
+
+    def get(self, url: str) -> 'requests.Response':
+        """Performs a single `GET`, honouring the per-host concurrency limit and the rate limit.
+
+        Args:
+            url (str): resource url
+
+        Returns:
+            requests.Response: the server response, raises `requests.HTTPError` on a non-2xx status
+        """
+        if self.cache is not None and self.cache.offline:
+            response, received = self.cache.get(self.session, url)
+        else:
+            if self.rate is not None:
+                self._throttle()
+            with self._slot(url):
+                if self.cache is None:
+                    response = self.session.get(url)
+                    received = len(response.content)
+                else:
+                    response, received = self.cache.get(self.session, url)
+            metrics.count(http_requests=1)
+        response.raise_for_status()
+        with self._lock:
+            self.files += 1
+            self.bytes += received
+            metrics.count(http_bytes=received)
+        return response
+
+    def get_all(self, urls: list[str]) -> Iterator[tuple[str, 'requests.Response']]:
+        """Downloads every url across the thread pool.
+
+        Args:
+            urls (list): urls to download
+
+        Returns:
+            Iterator: `(url, response)` pairs, in completion order
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.get, url): url for url in urls}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def report(self) -> str:
+        """Returns a throughput summary of everything downloaded since the downloader was created."""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        report = (f'downloaded {self.files} files, {self.bytes / 1024:.1f} kB in {elapsed:.2f}s '
+                  f'({self.files / elapsed:.1f} files/s, {self.bytes / 1024 / elapsed:.1f} kB/s)')
+        return report if self.cache is None else f'{report}, {self.cache.report()}'
+
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import pathlib
+import pickle
+from typing import Optional
+
+
+CACHE_DIR = 'processed_data/cache'
+# bump when the conversion of an event changes, so entries written by older code are not reused
+CACHE_VERSION = '3'
+
+
+def event_key(digests: list[Optional[str]], options: list) -> str:
+    """Returns the cache key of an event.
+
+    Args:
+        digests (list): hashes of the event's input files, `None` for a missing file
+        options (list): build options the conversion depends on
+
+    Returns:
+        str: key, made of the input hashes, so an event is reconverted as soon as any of its inputs change
+    """
+    parts = [CACHE_VERSION] + [str(d) for d in digests] + [str(o) for o in options]
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+
+def load(key: str) -> Optional[dict]:
+    """Returns the cached entry stored under `key`, `None` on a miss.
+
+    Returns:
+        dict: cached entry
+            Keys:
+                -`data`: the event's converted data
+                -`seconds`: time the conversion took when the entry was stored
+    """
+    try:
+        with open(f'{CACHE_DIR}/{key}.pickle', 'rb') as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def store(key: str, data, seconds: float) -> None:
+    """Stores an event's converted data (`model` objects, pickled) under `key`."""
+    pathlib.Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    # written aside and moved in place, events may be converted by several processes at once
+    tmp = f'{CACHE_DIR}/{key}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump({'data': data, 'seconds': seconds}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, f'{CACHE_DIR}/{key}.pickle')
+
+
+def prune(keep: set[str]) -> None:
+    """Removes every cached entry not in `keep`, so the cache holds only the last build's events."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for filename in os.listdir(CACHE_DIR):
+        if filename.endswith(('.json', '.pickle')) and filename.split('.')[0] not in keep:  # `.json`: entries of older versions
+            os.remove(f'{CACHE_DIR}/{filename}')
@@ -1,84 +1,212 @@
-import requests
 import json
+from array import array
 import pathlib
 import os
 import datetime
 import utils
-import inquirer
-import xml.etree.cElementTree as ET
-import xml.dom.minidom
-import filecmp
+import downloader
+from http_cache import HttpCache
+import repository
+import event_cache
+import lenex_writer
+import metrics
+import points
+import model
+import club_store
+from swimtime import SwimTime
+import shutil
+import io
+import itertools
+import contextlib
+import zipfile
 import re
+import time
 from datetime import date
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TextIO
+from urllib.parse import unquote
 
 
-def scrape_data(url: str) -> None:
-    """Main scraping function.
+if TYPE_CHECKING:  # `multiprocessing` is only loaded when converting with more than one worker
+    from concurrent.futures import ProcessPoolExecutor
 
-    Args:
-        url (str): given by the user
-    Returns:
-        None, files are stored automatically in the right folders, execution halts if code fails.
-    """
+LOW_MEMORY_PARSE_CACHE = 1024 * 1024  # parsed documents cache of a `low_memory` conversion, in bytes of source JSON
 
-    url: str = url.replace('/NU', '/export/NU').replace('_web.php', '')
-    counter_generale: str = requests.get(
-        f'{url}/NU/CounterGenerale.json?').text[:-2]
-    contatori: str = requests.get(
-        f'{url}/NU/Contatori.json?x={counter_generale}').json()['contatori']
+# every read of `scraped_data/` goes through this repository, shared by every build in the process
+scraped = repository.ScrapedData()
 
-    for obj in contatori:
-        # download json
-        scraped_data: str = requests.get(
-            f'{url}/NU/{obj["nomefile"]}?x={obj["counter"]}').json()
 
-        # assigns a category to the downloaded json. This category will also be part of its filepath
-        file_type: str = utils.FILE_TYPES.get(obj['cod'], "other")
+def load_manifest(url: Optional[str] = None) -> dict:
+    """Reads the scrape manifest, which stores the export it comes from, its last seen `CounterGenerale` and the last
+    seen counter of every file.
 
-        # create directory for a new type of file
-        pathlib.Path(f'scraped_data/{file_type}').mkdir(parents=True, exist_ok=True)
+    Args:
+        url (str): export's url, an empty manifest is returned if the stored one comes from another export
 
-        # write file into category path
-        with open(f'scraped_data/{file_type}/{scraped_data["jsonfilename"]}', 'w') as f:
-            f.write(json.dumps(scraped_data))
+    Returns:
+        dict: manifest's data
+            Keys:
+                -`url`: export's url, `None` if no meet was ever scraped
+                -`counter_generale`: last `CounterGenerale.json` value, `None` if the meet was never scraped
+                -`files`: dict, `nomefile` -> {`counter`, `path`}
+    """
+    empty = {'url': url, 'counter_generale': None, 'files': {}}
+    if not os.path.isfile(utils.MANIFEST_FILE):
+        return empty
+    with open(utils.MANIFEST_FILE, 'r') as f:
+        manifest = json.loads(f.read())
+    # the counters of another meet say nothing about this one, even when they match
+    return manifest if url is None or manifest.get('url') == url else empty
+
+
+def save_manifest(manifest: dict) -> None:
+    pathlib.Path(utils.MANIFEST_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(f'{utils.MANIFEST_FILE}.tmp', 'w') as f:
+        f.write(json.dumps(manifest))
+    os.replace(f'{utils.MANIFEST_FILE}.tmp', utils.MANIFEST_FILE)
+
+
+@contextlib.contextmanager
+def meet_directory(path: str) -> Iterator[None]:
+    """Runs the pipeline in a meet's working directory, the one holding (or to hold) its `scraped_data/`, going back to
+    the current directory on exit. Every path of the pipeline is relative to the working directory.
+    """
+    cwd = os.getcwd()
+    os.chdir(path)
+    scraped.clear()  # this process may have compiled another meet before
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+        scraped.clear()
+
+
+@metrics.stage('scrape')
+def scrape_data(url: str, workers: int = downloader.DEFAULT_WORKERS, host_limit: int = downloader.DEFAULT_HOST_LIMIT,
+                retries: int = downloader.DEFAULT_RETRIES, backoff: float = downloader.DEFAULT_BACKOFF,
+                force: bool = False, http_cache: bool = True, offline: bool = False,
+                on_file: Optional[Callable[[str], None]] = None) -> list[str]:
+    """Main scraping function.
+
+    Only the files whose `counter` moved since the last run are downloaded, nothing is if `CounterGenerale` didn't change.
+    The manifest is ignored when the last run scraped another competition.
+    Through the HTTP cache, a file whose counter moved is downloaded only if the server reports it actually changed.
+    The schedules are downloaded before every other file, so the meet can be planned while the results still download.
 
+    Args:
+        url (str): given by the user
+        workers (int): number of concurrent downloads
+        host_limit (int): max number of concurrent requests to the Microplus host
+        retries (int): retries for each file on connection errors or 5xx/429 responses
+        backoff (float): backoff factor between retries, in seconds
+        force (bool): ignore the manifest and download every file
+        http_cache (bool): send the requests through an `http_cache.HttpCache`
+        offline (bool): serve every request from the HTTP cache, without touching the network
+        on_file (Callable): called with the path of each file as soon as it's written, see `pipeline`
+    Returns:
+        list: paths of the files written, files are stored automatically in the right folders, execution halts if code fails.
+    """
 
-def get_competition_infos() -> dict:
+    url: str = url.replace('/NU', '/export/NU').replace('_web.php', '')
+    manifest: dict = {'url': url, 'counter_generale': None, 'files': {}} if force else load_manifest(url)
+    written: list[str] = []
+    cache = HttpCache(offline=offline) if http_cache or offline else None
+    with downloader.Downloader(workers, host_limit, retries, backoff, cache=cache) as dl:
+        counter_generale: str = dl.get(
+            f'{url}/NU/CounterGenerale.json?').text[:-2]
+        if counter_generale == manifest['counter_generale']:
+            print(f'CounterGenerale unchanged ({counter_generale}), nothing to download')
+            return written
+        contatori: str = dl.get(
+            f'{url}/NU/Contatori.json?x={counter_generale}').json()['contatori']
+
+        files = {}
+        for obj in contatori:
+            seen = manifest['files'].get(obj['nomefile'])
+            # skip files already downloaded with the same counter, unless they've been removed from disk
+            if seen is not None and seen['counter'] == obj['counter'] and os.path.isfile(seen['path']):
+                continue
+            files[f'{url}/NU/{obj["nomefile"]}?x={obj["counter"]}'] = obj
+        schedules = [file_url for file_url, obj in files.items() if obj['cod'] == 'SCH_D']
+        try:
+            for file_url, response in itertools.chain(dl.get_all(schedules),
+                                                      dl.get_all([u for u in files.keys() if files[u]['cod'] != 'SCH_D'])):
+                scraped_data: dict = response.json()
+                obj = files[file_url]
+
+                # assigns a category to the downloaded json. This category will also be part of its filepath
+                file_type: str = utils.FILE_TYPES.get(obj['cod'], "other")
+
+                # create directory for a new type of file
+                pathlib.Path(f'scraped_data/{file_type}').mkdir(parents=True, exist_ok=True)
+
+                # write file into category path, replacing the previous one at once: it may be read meanwhile (see `pipeline`)
+                path = f'scraped_data/{file_type}/{scraped_data["jsonfilename"]}'
+                with open(f'{path}.tmp', 'w') as f:
+                    f.write(json.dumps(scraped_data))
+                os.replace(f'{path}.tmp', path)
+                manifest['files'][obj['nomefile']] = {'counter': obj['counter'], 'path': path}
+                written.append(path)
+                if on_file is not None:
+                    on_file(path)
+            # the global stamp is stored only once every file it refers to is on disk
+            manifest['counter_generale'] = counter_generale
+        finally:
+            save_manifest(manifest)
+        print(f'{len(files)}/{len(contatori)} files changed, {dl.report()}')
+    return written
+
+
+def get_competition_infos(course: Optional[str] = None, nation: Optional[str] = None, interactive: bool = True) -> dict:
     """Reads the first `JSON` file in the `scraped_data/result` direcory, retrieves competition's generic data and asks to the user the missing infos.
 
+    Args:
+        course (str): pool length code, `SCM` or `LCM`. Asked to the user if missing
+        nation (str): venue's nation code. If missing, `ITA` for the usual italian venues, otherwise asked to the user
+        interactive (bool): ask the missing infos, when `False` a missing info raises a `ValueError` instead
+
     Returns:
         dict: competition's infos
     """
-    with open(f"scraped_data/results/{os.listdir('scraped_data/results')[0]}", 'r') as f:
-        data: dict[str, str] = json.loads(f.read())
-        pool_length_code: str = inquirer.prompt([inquirer.List('length', message="Pool Length", choices=[
-            'SCM', 'LCM'])])['length']
-        return {  # this script is specifically designed to scrape data from Microplus' systems
-            'constructor': {
-                'name': 'Microplus Informatica Srl - Scraped and Encoded by Alessandro Borsato, gh: @Slthy, tw: @aborsato_',
-                'registration': 'Scraped and Encoded by Alessandro Borsato, gh: @Slthy, tw: @aborsato_',
-                'version': '1.0',
-                'CONTACT': {
-                    'city': 'Marene',
-                    'zip': 'IT-12030',
-                    'country': 'ITA',
-                    'email': 'mbox@microplus.it',
-                    'internet': 'https://www.microplus.it'
-                }
-            },
-            'event': {  # generic data about the competition's venue
-                'name': data['Export']['ExpName'],
-                'desciption': data['Export']['ExpDescr'],
-                'city': data['Event']['Place'].split(',')[0],
-                'nation': 'ITA' if data['Event']['Place'].split(',')[0] in ['Roma', 'Riccione', 'Ostia']
-                else input(f'insert nation code (city: {data["Event"]["Place"].split(",")[0]}): '),
-                'course': pool_length_code,
-                'timing': "AUTOMATIC",
-                'lanemin': '0',
-                'lanemax': '9'
-            },
-            'pool_length': 50 if pool_length_code == 'LCM' else 25
-        }
+    data: dict[str, str] = scraped.first_results()
+    city = data['Event']['Place'].split(',')[0]
+    if course is None:
+        if not interactive:
+            raise ValueError(f'missing course of the meet in {os.getcwd()}')
+        import inquirer  # slow to import, only loaded to ask
+        course = inquirer.prompt([inquirer.List('length', message="Pool Length", choices=['SCM', 'LCM'])])['length']
+    pool_length_code: str = course
+    if nation is None:
+        if city in utils.ITALIAN_VENUES:
+            nation = 'ITA'
+        elif not interactive:
+            raise ValueError(f'missing nation code of the meet in {os.getcwd()} (city: {city})')
+        else:
+            nation = input(f'insert nation code (city: {city}): ')
+    return {  # this script is specifically designed to scrape data from Microplus' systems
+        'constructor': {
+            'name': 'Microplus Informatica Srl - Scraped and Encoded by Alessandro Borsato, gh: @Slthy, tw: @aborsato_',
+            'registration': 'Scraped and Encoded by Alessandro Borsato, gh: @Slthy, tw: @aborsato_',
+            'version': '1.0',
+            'CONTACT': {
+                'city': 'Marene',
+                'zip': 'IT-12030',
+                'country': 'ITA',
+                'email': 'mbox@microplus.it',
+                'internet': 'https://www.microplus.it'
+            }
+        },
+        'event': {  # generic data about the competition's venue
+            'name': data['Export']['ExpName'],
+            'desciption': data['Export']['ExpDescr'],
+            'city': city,
+            'nation': nation,
+            'course': pool_length_code,
+            'timing': "AUTOMATIC",
+            'lanemin': '0',
+            'lanemax': '9'
+        },
+        'pool_length': 50 if pool_length_code == 'LCM' else 25
+    }
 
 
 def get_entry_time(category: str, race_code: str, event_type: str, PlaCod: str) -> str:
@@ -87,284 +215,177 @@ def get_entry_time(category: str, race_code: str, event_type: str, PlaCod: str)
     Args:
         category (str): `athlete`'s category
         race_code (str): `event`'s race code
-        event_type (str): `event`'s event type
+        event_type (str): `event`'s Microplus round code, e.g. `001`
         PlaCod (str): `athlete` id
 
     Returns:
-        str: `athlete`'s entrytime
+        str: `athlete`'s entrytime, `None` if the athlete is not in the startlist
     """
-    with open(f'scraped_data/startlists/NU{category}{utils.RACE_CODES[race_code]}STAR{event_type} 001.JSON', 'r') as f:
-        for entry in json.loads(f.read())['data']:
-            if entry['PlaCod'] == PlaCod:
-                return utils.format_time(entry['MemIscr'])
+    entrytime = scraped.entry_times(category, race_code, event_type).get(PlaCod)
+    return None if entrytime is None else model.lenex_time(entrytime)
 
 
-def get_relay_splits_and_athletes(entry: dict[str], pool_length: int, gender: str):
-    """Returns the splits of a given relay and the general infos of the relay's atheletes
+def get_relay_splits_and_athletes(entry: dict[str], gender: str, team: int) -> tuple[array, list[model.Athlete], list[model.RelayPosition]]:
+    """Returns the splits of a given relay, its athletes and their positions
 
     Args:
         entry (dict): relay informations
-        pool_length (int): pool length
-        gender (str): relay gender
-            Possible Values:
-                -`M`: male event
-                -`F`: female event
-                -`X`: mixed event
+        gender (str): athletes' gender
+        team (int): relay's team id, in the event's `model.Teams`
 
     Returns:
-        dict: relay's splits
+        tuple: relay's encoded splits, relay's athletes, athletes' positions
     """
     splits = []
-    player_positions = []
+    athletes: list[model.Athlete] = []
+    positions: list[model.RelayPosition] = []
     for player in entry['Players']:
-        player_positions.append({
-            'number': str(len(player_positions) + 1),
-            'athleteid': player['PlaCod'],
-            'reactiontime': player['PlaRT'],
-            'lastname': player['PlaSurname'],
-            'firstname': player['PlaName'],
-            'gender': gender,
-            'birthdate': player['PlaBirth'],
-            'team': {
-                'name': entry['TeamDescrIta'],
-                'shortname': entry['TeamDescrItaVis'],
-                'code': entry['PlaNat'],
-                'nation': entry['PlaNat'],
-                'type': 'CLUB'  # hardcoded
-            }
-        })
+        athletes.append(model.Athlete(player['PlaCod'], player['PlaSurname'], player['PlaName'], gender,
+                                      player['PlaBirth'], team))
+        positions.append(model.RelayPosition(player['PlaCod'], player['PlaRT']))
         player_splits = []
         for i in range(1, 5):
             if player[f'PlaInt{i}'] == '':
                 continue
-            player_splits.append(utils.format_time(player[f'PlaInt{i}']))
+            player_splits.append(SwimTime.parse(player[f'PlaInt{i}']))
         if len(splits) < 4:
             splits = player_splits
         else:
+            # players' splits restart from zero at every leg, relay splits are cumulative
             for i in range(len(player_splits)):
                 t1 = splits[-1]
                 t2 = player_splits[i]
                 if i == 0:
-                    splits.append(utils.add_times(t1, t2, "00:00:00.00"))
+                    splits.append(t1 + t2)
                 else:
-                    splits.append(utils.add_times(t1, t2, player_splits[i-1]))
-    return {
-        'data': [{
-            'distance': str(pool_length*index + pool_length),
-            'swimtime': splits[index-1],
-        } for index in range(len(splits))],
-        'player_positions': player_positions
-    }
+                    splits.append(t1 + t2 - player_splits[i-1])
+    return array('l', [model.encode_time(splits[index-1]) for index in range(len(splits))]), athletes, positions
 
 
-def get_heats(event: dict[str, str], eventid: int, pool_length: int) -> dict:
+@metrics.stage('get_heats')
+def get_heats(event: dict[str, str], eventid: int, pool_length: int, point_table: str = points.DEFAULT_POINT_TABLE) -> model.EventResults:
     """returns LENEX `heats` component for a given event
 
     Args:
         event (dict): `event` dictionary
         eventid (int): event id
         pool_length (int): pool length
+        point_table (str): key of the points table in `points.POINT_TABLES`
 
     Returns:
-        dict: a dictionary with two keys
-            Keys:
-                -`heats`: heats in the given event
-                -`entries`: dict
-                    Keys:
-                        -`data`: `entries`' data
-                        `type`: `entries`' type
-                            Possible values:
-                                -`relays`: relay event
-                                -`heats`: single event
+        model.EventResults: event's heats, agegroup, athletes and relays
     """
-    with open(f'scraped_data/results/NU{event["c0"]}{utils.RACE_CODES[event["d_en"]]}CLAS{event["c2"][::2]} 001.JSON', 'r') as f:
-        heats: dict[str, str] = {}
-        heat_entries: dict = json.loads(f.read())
-        data: list[dict[list, str]] = heat_entries['data']
-        agegroup: dict[str, list] = {
-            'id': f'10{eventid}',
-            'age_costraints': {
-                'agemax': '-1',
-                'agemin': '-1'
-            },
-            'results': []
-        }
-        
-        
-
-
-        cat = heat_entries['Category']['Cod']
-
-        if cat in utils.JUNIOR_CATEGORIES.keys():
-            agegroup['age_costraints']['agemax'] = utils.JUNIOR_CATEGORIES[cat]['agemax']
-            agegroup['age_costraints']['agemin'] = utils.JUNIOR_CATEGORIES[cat]['agemin']
-        elif re.match(r'^\d\d[FM]$', cat): #regex ,  0, -1
-            yob = int(f'20{cat[0]}{cat[1]}')
-            agegroup['age_costraints']['agemax'] = str(date.today().year - yob)
-            agegroup['age_costraints']['agemin'] = str(date.today().year - yob - 1)
-        elif  heat_entries["Round"]["Cod"] == "006": #agegroup for juniopr finals
-            agegroup['age_costraints']['agemax'] = "15"
-            agegroup['age_costraints']['agemin'] = "18"
-
-        entries: dict[str, list[list, list]] = {
-            'type': 'relays' if 'Players' in data[0].keys() else 'heats',
-            'data': [[], []]  # indexes: 0 for single entries, 1 for relays
-        }
+    heat_entries = scraped.results(event["c0"], event["d_en"], event["c2"])
+    # only individual events read their startlist, a relay's may be missing
+    entry_times = {} if 'Players' in heat_entries['data'][0].keys() else \
+        scraped.entry_times(event["c0"], event["d_en"], event["c2"])
+    return convert_heats(heat_entries, entry_times, event, eventid, pool_length, point_table)
 
-        result_n = 1
-        # relay event --HANDLE people that only swim in relays--
-        if 'Players' in data[0].keys():
-            times = []
-            DNFs = []
-            for entry in data:
-                heatid = f'{entry["b"]}000{eventid}'
-                swimtime = utils.format_time(entry['MemPrest'])
-                splits = get_relay_splits_and_athletes(
-                    entry, pool_length, heat_entries['Category']['Cod'][-1])
-                resultid = f'20{eventid}{result_n}'
-                entries['data'][0].append(
-                    [{'athlete_infos': a} for a in splits['player_positions']])
-                entries['data'][1].append({
-                    'relay_infos': {
-                        'gender': event["c0"][-1] if event["c0"][-1] in ['M', 'F'] else 'X',
-                        'team': {
-                            'name': entry['TeamDescrIta'],
-                            'code': entry['PlaTeamCod'],
-                            'nation': entry['PlaNat'],
-                            'type': 'CLUB'  # hardcoded
-                        }
-                    },
-                    'result': {
-                        'eventid': str(eventid),
-                        'agegroupid': agegroup['id'],
-                        'resultid': resultid,
-                        'place': entry['PlaCls'],  # TODO! place
-                        'lane': entry['PlaLane'],
-                        'heat': str(entry["b"]),
-                        'heatid': str(heatid),
-                        'swimtime': swimtime,
-                        'reactiontime': '',
-                        'splits': splits
-                    }
-                })
 
-                if entry["b"] not in heats.keys():
-                    heats[entry["b"]] = {
-                        'daytime': heat_entries['Heat']['UffTime'],
-                        'heatid': heatid,
-                        'number': entry["b"]
-                    }
-
-                if entry['PlaCls'].isdigit():
-                    times.append({'resultid': resultid, 'swimtime_float': utils.time_to_timedelta(swimtime).total_seconds()})
-                else:
-                    DNFs.append({'resultid': resultid, 'swimtime': entry['PlaCls']})
-                result_n = result_n + 1
-            
-            sorted_rankings = sorted(times, key = lambda x: x['swimtime_float'])
-            for index, result in enumerate(sorted_rankings):
-                agegroup['results'].append({
-                        'order': str(index + 1),
-                        'place': str(index + 1),
-                        'resultid': result['resultid']
-                    })
-            for index, dnf in enumerate(DNFs):
-                agegroup['results'].append({
-                        'order': str((index + 1) + len(sorted_rankings)),
-                        'place': str((index + 1) + len(sorted_rankings)),
-                        'resultid': dnf['resultid']
-                    })
-        else:  # single event
-            times = []
-            DNFs = []
-            for entry in data:
-                
-                heatid = f'{entry["b"]}000{eventid}'
-                resultid = f'20{eventid}000{result_n}'
-                entrytime = get_entry_time(
-                    event["c0"], event["d_en"], event["c2"][::2], entry['PlaCod'])
-                splits = []
-                # first element is blank every time, so we cut it
-                for index, time in enumerate(entry['MemFields'][1:]):
-                    if time['V'] == "":
-                        break
-                    splits.append({
-                        'distance': str(pool_length*index + pool_length),
-                        'swimtime': utils.format_time(time['V'])
-                    })
-                swimtime = utils.format_time(entry['MemPrest'])
-                swimstyle_split = event["d_en"].split('m')
-                entries['data'][0].append({
-                    'athlete_infos': {
-                        'athleteid': entry['PlaCod'],
-                        'lastname': entry['PlaSurname'],
-                        'firstname': entry['PlaName'],
-                        'gender': event["c0"][-1],
-                        'birthdate': entry['PlaBirth'],
-                        'team': {
-                            'name': entry['TeamDescrIta'],
-                            'shortname': entry['TeamDescrItaVis'],
-                            'code': entry['PlaNat'],
-                            'nation': entry['PlaNat'],
-                            'type': 'CLUB'  # hardcoded
-                        }
-                    },
-                    'entry': {
-                        'eventid': str(eventid),
-                        'entrytime': entrytime,
-                        'heat': str(entry["b"]),
-                        'lane': entry['PlaLane'],
-                        'meetinfo': heat_entries['Heat']['UffDate']
-                    },
-                    'result': {
-                        'eventid': str(eventid),
-                        'agegroupid': agegroup['id'],
-                        'resultid': resultid,
-                        'place': entry['PlaCls'],
-                        'lane': entry['PlaLane'],
-                        'heat': str(entry["b"]),
-                        'heatid': heatid,
-                        'swimtime': swimtime,
-                        'points': str(utils.get_fina_points(swimtime, 
-                                                            swimstyle_split[0].strip(), 
-                                                            utils.LENEX_STROKES[swimstyle_split[1].strip()],
-                                                            event["c0"][-1],
-                                                            'LCM' if pool_length == 50 else 'SCM')) if swimtime != 'NT' else '',
-                        'reactiontime': '',
-                        'splits': splits
-                    }
-                })
-                get_entry_time(
-                    event["c0"], event["d_en"], event["c2"][::2], entry['PlaCod'])
-                if entry['b'] not in heats.keys():
-                    heats[str(entry["b"])] = {
-                        'daytime': heat_entries['Heat']['UffTime'],
-                        'heatid': heatid,
-                        'number': str(entry["b"])
-                    }
-
-                if entry['PlaCls'].isdigit():
-                    times.append({'resultid': resultid, 'swimtime_float': utils.time_to_timedelta(swimtime).total_seconds()})
-                else:
-                    DNFs.append({'resultid': resultid, 'swimtime': entry['PlaCls']})
-                result_n = result_n + 1
-            
-            sorted_rankings = sorted(times, key = lambda x: x['swimtime_float'])
-            for index, result in enumerate(sorted_rankings):
-                agegroup['results'].append({
-                        'order': str(index + 1),
-                        'place': str(index + 1),
-                        'resultid': result['resultid']
-                    })
-            for index, dnf in enumerate(DNFs):
-                agegroup['results'].append({
-                        'order': str((index + 1) + len(sorted_rankings)),
-                        'place': str((index + 1) + len(sorted_rankings)),
-                        'resultid': dnf['resultid']
-                    })
+def convert_heats(heat_entries: dict, entry_times: dict[str, int], event: dict[str, str], eventid: int,
+                  pool_length: int, point_table: str = points.DEFAULT_POINT_TABLE) -> model.EventResults:
+    """Converts an event's results file, see `get_heats`
 
+    Args:
+        heat_entries (dict): event's results file
+        entry_times (dict): `PlaCod` -> encoded entry time, from the event's startlist
+        event (dict): `event` dictionary
+        eventid (int): event id
+        pool_length (int): pool length
+        point_table (str): key of the points table in `points.POINT_TABLES`
 
-    return {'heats': dict(sorted(heats.items())), 'agegroup': agegroup, 'entries': entries}
+    Returns:
+        model.EventResults: event's heats, agegroup, athletes and relays
+    """
+    heats: dict[str, model.Heat] = {}
+    data: list[dict[list, str]] = heat_entries['data']
+    agemax, agemin = '-1', '-1'
+
+    cat = heat_entries['Category']['Cod']
+
+    if cat in utils.JUNIOR_CATEGORIES.keys():
+        agemax = utils.JUNIOR_CATEGORIES[cat]['agemax']
+        agemin = utils.JUNIOR_CATEGORIES[cat]['agemin']
+    elif re.match(r'^\d\d[FM]$', cat): #regex ,  0, -1
+        yob = int(f'20{cat[0]}{cat[1]}')
+        agemax = str(date.today().year - yob)
+        agemin = str(date.today().year - yob - 1)
+    elif  heat_entries["Round"]["Cod"] == "006": #agegroup for juniopr finals
+        agemax = "15"
+        agemin = "18"
+    agegroup = model.AgeGroup(int(f'10{eventid}'), agemax, agemin)
+
+    teams = model.Teams()
+    athletes: list[model.Athlete] = []
+    relays: list[model.Relay] = []
+    daytime = heat_entries['Heat']['UffTime']
+    meetinfo = heat_entries['Heat']['UffDate']
+    times = []  # (swimtime, resultid) of the ranked results
+    DNFs = []
+
+    # relay event --HANDLE people that only swim in relays--
+    if 'Players' in data[0].keys():
+        gender = event["c0"][-1] if event["c0"][-1] in ['M', 'F'] else 'X'
+        for result_n, entry in enumerate(data, 1):
+            team = teams.intern(entry['TeamDescrIta'], entry['PlaNat'])
+            splits, relay_athletes, positions = get_relay_splits_and_athletes(
+                entry, heat_entries['Category']['Cod'][-1], team)
+            resultid = int(f'20{eventid}{result_n}')
+            swimtime = model.encode_time(SwimTime.parse(entry['MemPrest']))
+            athletes += relay_athletes
+            relays.append(model.Relay(gender, team, model.Result(
+                eventid, resultid, model.code(entry['PlaCls']), model.code(entry['PlaLane']), model.code(entry["b"]),
+                swimtime, splits), positions))
+
+            if str(entry["b"]) not in heats.keys():
+                heats[str(entry["b"])] = model.Heat(eventid, model.code(entry["b"]), daytime)
+
+            if entry['PlaCls'].isdigit():
+                times.append((swimtime, resultid))
+            else:
+                DNFs.append(resultid)
+    else:  # single event
+        swim_times: list = []
+        results: list[model.Result] = []
+        for result_n, entry in enumerate(data, 1):
+            resultid = int(f'20{eventid}000{result_n}')
+            splits = array('l')
+            # first element is blank every time, so we cut it
+            for time in entry['MemFields'][1:]:
+                if time['V'] == "":
+                    break
+                splits.append(model.encode_time(SwimTime.parse(time['V'])))
+            swim_time = SwimTime.parse(entry['MemPrest'])
+            swim_times.append(swim_time)
+            heat, lane = model.code(entry["b"]), model.code(entry['PlaLane'])
+            result = model.Result(eventid, resultid, model.code(entry['PlaCls']), lane, heat,
+                                  model.encode_time(swim_time), splits)
+            results.append(result)
+            athletes.append(model.Athlete(
+                entry['PlaCod'], entry['PlaSurname'], entry['PlaName'], event["c0"][-1], entry['PlaBirth'],
+                teams.intern(entry['TeamDescrIta'], entry['PlaNat']),
+                model.Entry(eventid, entry_times.get(entry['PlaCod'], model.NO_TIME), heat, lane, meetinfo),
+                result))
+
+            if str(entry["b"]) not in heats.keys():
+                heats[str(entry["b"])] = model.Heat(eventid, heat, daytime)
+
+            if entry['PlaCls'].isdigit():
+                times.append((result.swimtime, resultid))
+            else:
+                DNFs.append(resultid)
+
+        swimstyle_split = event["d_en"].split('m')
+        event_points = points.POINT_TABLES[point_table].score_event(swim_times,
+                                                                    int(swimstyle_split[0].strip()),
+                                                                    utils.LENEX_STROKES[swimstyle_split[1].strip()],
+                                                                    event["c0"][-1],
+                                                                    'LCM' if pool_length == 50 else 'SCM')
+        for result, result_points in zip(results, event_points):
+            result.points = result_points
+
+    agegroup.rankings = [resultid for _, resultid in sorted(times, key=lambda x: x[0])] + DNFs
+    return model.EventResults([heats[h] for h in sorted(heats.keys())], agegroup, teams, athletes, relays)
 
 
 def get_event_infos(event: dict[str, str], eventid: int, filename: str, number: int) -> dict:
@@ -408,168 +429,266 @@ def get_event_infos(event: dict[str, str], eventid: int, filename: str, number:
     }
 
 
-def convert_to_lenex(pool_length: int) -> dict:
+def event_paths(event: dict[str, str]) -> list[str]:
+    """Returns the paths of the files `get_heats` reads for an event: its results, and the startlist of an individual
+    event (a relay's may be missing).
+    """
+    kinds = ['CLAS'] if 'x' in event["d_en"].split('m')[0] else ['CLAS', 'STAR']
+    return [scraped.event_path(event["c0"], event["d_en"], event["c2"], kind) for kind in kinds]
+
+
+@metrics.stage('convert_event')
+def convert_event(event: dict[str, str], eventid: int, pool_length: int, point_table: str, cache: bool = True) -> dict:
+    """Converts an event with `get_heats`, reusing the cached conversion if none of its inputs changed
+
+    Args:
+        event (dict): `event` dictionary
+        eventid (int): event id
+        pool_length (int): pool length
+        point_table (str): key of the points table in `points.POINT_TABLES`
+        cache (bool): look up and store the conversion in `event_cache`
+
+    Returns:
+        dict: conversion's data
+            Keys:
+                -`heats_data`: `model.EventResults` returned by `get_heats`
+                -`key`: event's cache key, `None` if the cache is disabled
+                -`cached`: whether `heats_data` comes from the cache
+                -`seconds`: time the conversion took, when it was done
+    """
+    if not cache:
+        return {'heats_data': get_heats(event, eventid, pool_length, point_table), 'key': None, 'cached': False, 'seconds': 0.0}
+
+    key = event_cache.event_key(
+        [scraped.digest(path) for path in event_paths(event)],
+        # the agegroups of the `YYF`/`YYM` categories depend on the current year
+        [eventid, pool_length, point_table, date.today().year])
+    cached = event_cache.load(key)
+    if cached is not None:
+        return {'heats_data': cached['data'], 'key': key, 'cached': True, 'seconds': cached['seconds']}
+    started = time.perf_counter()
+    heats_data = get_heats(event, eventid, pool_length, point_table)
+    seconds = time.perf_counter() - started
+    event_cache.store(key, heats_data, seconds)
+    return {'heats_data': heats_data, 'key': key, 'cached': False, 'seconds': seconds}
+
+
+def init_worker(store, max_bytes: int) -> None:
+    """Initializer of `convert_to_lenex`'s process pool: the workers read the parent's store, with its cache size cap.
+
+    Nothing is inherited from the parent's `scraped` when the workers aren't forked (`spawn` on macOS and Windows).
+    """
+    scraped.use(store)
+    scraped.resize(max_bytes)
+
+
+def convert_event_recorded(event: dict[str, str], eventid: int, pool_length: int, point_table: str, cache: bool,
+                           trace_memory: bool) -> dict:
+    """`convert_event` for the process pool's workers, adding the `metrics` stages it recorded to the conversion"""
+    metrics.enable(trace_memory)
+    conversion = convert_event(event, eventid, pool_length, point_table, cache)
+    return conversion | {'metrics': metrics.disable().report()['stages']}
+
+
+@metrics.stage('plan')
+def plan_sessions() -> dict[str, list]:
+    """Reads the schedules and assigns to every event its eventid and its parent event, before any result is converted
+
+    Returns:
+        dict: `session` number -> `session`'s events
+            Keys (of each event):
+                -`schedule`: `event` dictionary, as in `ScheduleByDate_N.JSON`
+                -`infos`: `event`'s generic infos, returned by `get_event_infos`
+    """
+    eventid = 1
+    prelims_eventid: list = []
+    sessions: dict[str, list] = {}
+    for session_n in scraped.sessions():
+        filename = f'ScheduleByDate_{session_n}.JSON'
+        session = []
+        for event in scraped.schedule(session_n)['e']:
+            infos = get_event_infos(event, eventid, filename, eventid)  # event_number = event_id
+            # if the event is a preliminary or heat, put race_code, eventid and -current event's- category into the prelims list
+            if infos['lenex']['event']['preveventid'] == '-1':
+
+                prelims_eventid.append({
+                    'race_code': utils.RACE_CODES[event["d_en"]],
+                    'eventid': infos['lenex']['event']['eventid'],
+                    'category': event['c0']
+                })
+
+            eventid = eventid + 1
+            # if event has a prev_event, the parent event in the prelims list. This script is designed for 'normal' event, no semis. # TODO: #8 handle semis (and quarters)
+            if infos['lenex']['event']['preveventid'] == '00':
+                for prelim in prelims_eventid:
+                    if infos['race_code'] == prelim['race_code'] and infos['category'] == prelim['category']:
+                        infos['lenex']['event']['preveventid'] = prelim['eventid']
+
+            session.append({'schedule': event, 'infos': infos})
+        sessions[str(session_n)] = session
+    return sessions
+
+
+@metrics.stage('convert')
+def convert_to_lenex(pool_length: int, point_table: str = points.DEFAULT_POINT_TABLE, workers: int = 1,
+                     cache: bool = True, low_memory: bool = False) -> dict:
     """Converts scraped data to match `LENEX` documentation
 
+    Events are independent once `plan_sessions` has assigned their ids, with `workers` > 1 they are converted across a
+    process pool and merged back in schedule order, giving the same output as the serial conversion.
+
+    With `low_memory`, sessions are converted one at a time, the parsed documents cache is shrunk to
+    `LOW_MEMORY_PARSE_CACHE` and the athletes and relays of each event are spilled to a `club_store.ClubStore` as soon as
+    it's converted: only the sessions' events (heats and rankings) stay in memory, the clubs are read back one by one
+    while `write_lenex` writes them, closing the store: the data can be written once. The output is the same.
+
     Args:
         pool_length (int): pool length
+        point_table (str): key of the points table in `points.POINT_TABLES`
+        workers (int): number of processes converting events, 1 converts them in the current process
+        cache (bool): reuse the conversion of the events whose input files didn't change since the last build
+        low_memory (bool): bound the memory used by the conversion, regardless of the meet's size
 
     Returns:
         dict: converted data
             Keys:
                 -`sessions`: LENEX `sessions` collection data
-                -`clubs`: LENEX `clubs` collection data
+                -`clubs`: list of `model.Club`, indexed by team id, or a `club_store.ClubStore` yielding them
     """
-    
-    eventid = 1
-    events: list = []
-    prelims_eventid: list = []
     sessions: dict[str, list] = {}
-    entries: dict[list, list] = {
-        'athletes': [],
-        'relays': []
-    }
+    events_results: list[model.EventResults] = []
+    clubs = club_store.ClubStore() if low_memory else None
 
     # create directory to store the processed data
     pathlib.Path('processed_data').mkdir(parents=True, exist_ok=True)
-    for session_n in range(len(os.listdir('scraped_data/schedules/by_date')) + 1):
-        filename = f'ScheduleByDate_{session_n + 1}.JSON'
-        if os.path.isfile(f'scraped_data/schedules/by_date/{filename}'):
-            with open(f'scraped_data/schedules/by_date/{filename}', 'r') as f:
-                data: list = json.loads(f.read())['e']
-                session = []
-                for event in data:
-                    heats_data = get_heats(event, eventid, pool_length)
-                    infos = get_event_infos(event, eventid, filename, eventid) | { #event_number = event_id 
-                        'agegroup': heats_data['agegroup']}
-                    race = infos | {'heats': heats_data['heats']}
-                    if heats_data['entries']['type'] == 'heats':
-                        entries['athletes'] += heats_data['entries']['data'][0]
-                    else:
-                        for athlete in heats_data['entries']['data'][0]:
-                            entries['athletes'] += athlete
-                        entries['relays'] += heats_data['entries']['data'][1]
-                    # if the event is a preliminary or heat, put race_code, eventid and -current event's- category into the prelims list
-                    if race['lenex']['event']['preveventid'] == '-1':
-
-                        prelims_eventid.append({
-                            'race_code': utils.RACE_CODES[event["d_en"]],
-                            'eventid': race['lenex']['event']['eventid'],
-                            'category': event['c0']
-                        })
-
-                    eventid = eventid + 1
-                    # if event has a prev_event, the parent event in the prelims list. This script is designed for 'normal' event, no semis. # TODO: #8 handle semis (and quarters)
-                    if race['lenex']['event']['preveventid'] == '00':
-                        for prelim in prelims_eventid:
-                            #print(prelim['category'], race['race_code'])
-                            if event['c2'] == '006' :
-                                if race['race_code'] == prelim['race_code'] and race['category'] == prelim['category']:
-                                    race['lenex']['event']['preveventid'] = prelim['eventid']
-                            else:
-                                if race['race_code'] == prelim['race_code'] and race['category'] == prelim['category']:
-                                    race['lenex']['event']['preveventid'] = prelim['eventid']
-
-                        
-                    events.append(race)
-                    session.append(race)
-                sessions[str(session_n + 1)] = session
+    planned = plan_sessions()
+    events = [event for session in planned.values() for event in session]
+    collector = metrics.collector()
+
+    def convert(pool: Optional['ProcessPoolExecutor'], batch: list[dict]) -> Iterator[dict]:
+        """Converts `batch`'s events, yielding their conversions in order"""
+        args = ([e['schedule'] for e in batch], [int(e['infos']['lenex']['event']['eventid']) for e in batch],
+                [pool_length] * len(batch), [point_table] * len(batch), [cache] * len(batch))
+        if pool is None:
+            yield from map(convert_event, *args)
+        elif collector is None:
+            yield from pool.map(convert_event, *args, chunksize=max(1, len(batch) // (workers * 4)))
+        else:  # the workers record their own stages, added to this process' ones
+            for conversion in pool.map(convert_event_recorded, *args, [collector.trace_memory] * len(batch),
+                                       chunksize=max(1, len(batch) // (workers * 4))):
+                collector.merge(conversion['metrics'], 'convert_event')
+                yield conversion
+
+    cache_keys: set[str] = set()
+    hits, seconds_saved = 0, 0.0
+    max_bytes = scraped.max_bytes
+    with contextlib.ExitStack() as stack:
+        if low_memory:
+            scraped.resize(min(max_bytes, LOW_MEMORY_PARSE_CACHE))
+            stack.callback(scraped.resize, max_bytes)
+        pool = None
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                           initargs=(scraped.store, scraped.max_bytes)))
+        if low_memory:
+            # a session is submitted to the pool once the previous one is consumed
+            converted = itertools.chain.from_iterable(convert(pool, session) for session in planned.values())
+        else:
+            converted = convert(pool, events)
+        for session_n, planned_session in planned.items():
+            session = []
+            for event in planned_session:
+                conversion = next(converted)
+                heats_data: model.EventResults = conversion['heats_data']
+                if conversion['cached']:
+                    hits += 1
+                    seconds_saved += conversion['seconds']
+                cache_keys.add(conversion['key'])
+                race = event['infos'] | {'agegroup': heats_data.agegroup, 'heats': heats_data.heats}
+                if clubs is None:
+                    events_results.append(heats_data)
+                else:
+                    clubs.add(heats_data)
+                session.append(race)
+            sessions[session_n] = session
+    if cache:
+        event_cache.prune(cache_keys)
+        print(f'event cache: {hits}/{len(events)} hits ({hits / max(len(events), 1):.0%}), ~{seconds_saved:.2f}s of conversion saved')
 
     for key in sessions.keys():  # add contextual data for the session
-        with open(f'scraped_data/results/{sessions[key][0]["jsonfilename"]}', 'r') as f:
-            data = json.loads(f.read())['Heat']
-            sessions[key] = {
-                'infos': {
-                    'number': str(key),
-                    'date': datetime.datetime.strptime(data['UffDate'], "%d/%m/%Y").strftime("%Y-%m-%d"),
-                    'daytime': data['UffTime']
-                },
-                'events': sessions[key]
-            }
+        data = scraped.document(f'results/{sessions[key][0]["jsonfilename"]}')['Heat']
+        sessions[key] = {
+            'infos': {
+                'number': str(key),
+                'date': datetime.datetime.strptime(data['UffDate'], "%d/%m/%Y").strftime("%Y-%m-%d"),
+                'daytime': data['UffTime']
+            },
+            'events': sessions[key]
+        }
 
-    clubs = {}
-    for entry in entries['athletes']:
-        infos = entry['athlete_infos']
-        club_name = infos['team']['name']
-        athleteid = infos['athleteid']
-        if club_name not in clubs.keys():  # new club
-            club_infos = infos['team']
-            del infos['team']
-            clubs[club_name] = {
-                'infos': club_infos,
-                'athletes': {
-                    athleteid: {'athlete_infos': infos}
-                },
-                'relays': []
-            }
-            if len(entry.keys()) > 1:  # athlete has entries and results
-                clubs[club_name]['athletes'][athleteid]['entries'] = [
-                    entry['entry']]
-                clubs[club_name]['athletes'][athleteid]['results'] = [
-                    entry['result']]
-
-        # club already in 'clubs' dict, new athlete to add
-        elif athleteid not in clubs[club_name]['athletes'].keys():
-            del infos['team']
-            clubs[club_name]['athletes'][athleteid] = {'athlete_infos': infos}
-            if len(entry.keys()) > 1:  # athlete has entries and results
-                clubs[club_name]['athletes'][athleteid]['entries'] = [
-                    entry['entry']]
-                clubs[club_name]['athletes'][athleteid]['results'] = [
-                    entry['result']]
-        else:  # both club and athlete are in the c/a dicts, append new data to 'entries' and 'results' field
-
-            try:
-                if len(entry.keys()) > 1:  # athlete has entries and result
-                    clubs[club_name]['athletes'][athleteid]['entries'].append(
-                        entry['entry'])
-                    clubs[club_name]['athletes'][athleteid]['results'].append(
-                        entry['result'])
-            except KeyError:  # the first at
-                clubs[club_name]['athletes'][athleteid]['entries'] = [
-                    entry['entry']]
-                clubs[club_name]['athletes'][athleteid]['results'] = [
-                    entry['result']]
-
-    for entry in entries['relays']:
-        club_name = entry['relay_infos']['team']['name']
-
-        if club_name not in clubs.keys():  # new club
-            clubs[club_name] = {
-                'infos': entry['relay_infos']['team'],
-                'athletes': {},
-                'relays': [entry]
-            }
-            for athlete in entry['result']['splits']['player_positions']:
-                clubs[club_name]['athletes'][athleteid] = {
-                    'athlete_infos': athlete
-                }
-        else:
-            clubs[club_name]['relays'].append(entry)
+    return {'sessions': sessions, 'clubs': model.merge_clubs(events_results) if clubs is None else clubs}
 
-    return {'sessions': sessions, 'clubs': clubs}
 
+def build_lenex(point_table: str = points.DEFAULT_POINT_TABLE, workers: int = 1,
+                course: Optional[str] = None, nation: Optional[str] = None, cache: bool = True,
+                low_memory: bool = False, interactive: bool = True) -> dict:
+    """Main function, elaborates the scraped data into `LENEX` data, ready to be written by `write_lenex`
 
-def build_lenex() -> str:
-    """Main function, elaborates and compile data into a `XML` string
+    Args:
+        point_table (str): key of the points table in `points.POINT_TABLES` used to score the results
+        workers (int): number of processes converting events, see `convert_to_lenex`
+        course (str): pool length code, see `get_competition_infos`
+        nation (str): venue's nation code, see `get_competition_infos`
+        cache (bool): reuse the conversion of unchanged events, see `convert_to_lenex`
+        low_memory (bool): spill the clubs to disk and convert one session at a time, see `convert_to_lenex`
+        interactive (bool): ask the missing `course` and `nation`, see `get_competition_infos`
 
     Returns:
         dict: compiled data
             Keys:
-                -`xml`: a string containing the xml file to be written
+                -`lenex`: competition's infos, sessions and clubs
                 -`event_name`: event's name and xml's filename
     """
-    competition_infos = get_competition_infos()
+    competition_infos = get_competition_infos(course, nation, interactive)
     data: dict = competition_infos | convert_to_lenex(
-        competition_infos['pool_length'])
-    root = ET.Element("LENEX", version="3.0")
-    constructor = ET.SubElement(root,
-                                "CONSTRUCTOR", {
-                                    'name': data['constructor']['name'],
-                                    'registration': data['constructor']['registration'],
-                                    'version': data['constructor']['version']
-                                })
-    ET.SubElement(constructor, "CONTACT", {
+        competition_infos['pool_length'], point_table, workers, cache, low_memory) | {'point_table': point_table}
+    event_name: str = data['event']['name']
+
+    return {
+        'lenex': data,
+        'event_name': event_name.replace(' ', '_')
+    }
+
+
+def write_splits(writer: lenex_writer.LenexWriter, splits: array, pool_length: int) -> None:
+    """Writes a result's `SPLITS`, one every `pool_length` meters."""
+    writer.start("SPLITS")
+    for index, split in enumerate(splits):
+        writer.element("SPLIT", {
+            'distance': str(pool_length*index + pool_length),
+            'swimtime': model.lenex_time(split)
+        })
+    writer.end()  # SPLITS
+
+
+@metrics.stage('serialize')
+def write_lenex(data: dict, stream: TextIO) -> None:
+    """Serializes `LENEX` data to `stream`, element by element, without building the document in memory.
+
+    Args:
+        data (dict): `lenex` data returned by `build_lenex`
+        stream (TextIO): output stream
+    """
+    writer = lenex_writer.LenexWriter(stream)
+    writer.declaration()
+    writer.start("LENEX", {'version': "3.0"})
+    writer.start("CONSTRUCTOR", {
+        'name': data['constructor']['name'],
+        'registration': data['constructor']['registration'],
+        'version': data['constructor']['version']
+    })
+    writer.element("CONTACT", {
         'name': data['constructor']['name'],
         'zip': data['constructor']['CONTACT']['zip'],
         'city': data['constructor']['CONTACT']['city'],
@@ -577,33 +696,35 @@ def build_lenex() -> str:
         'email': data['constructor']['CONTACT']['email'],
         'internet': data['constructor']['CONTACT']['internet'],
     })
-    meets = ET.SubElement(root, "MEETS")
-    meet = ET.SubElement(meets, "MEET", {
+    writer.end()  # CONSTRUCTOR
+    writer.start("MEETS")
+    writer.start("MEET", {
         'name': data['event']['name'],
         'city': data['event']['city'],
         'nation': data['event']['nation'],
         'course': data['event']['course'],
         'timing': data['event']['timing']
     })
-    ET.SubElement(meet, "POOL", {
+    writer.element("POOL", {
         'lanemin': data['event']['lanemin'],
         'lanemax': data['event']['lanemax']
     })
-    ET.SubElement(meet, "POINTTABLE", {
-        'name': 'FINA Point Scoring',
-        'version': '2023'
-    })
-    sessions = ET.SubElement(meet, "SESSIONS")
+    if data['point_table'] is not None:  # `None` for a LENEX file scored with a table not in `points.POINT_TABLES`
+        writer.element("POINTTABLE", {
+            'name': points.POINT_TABLES[data['point_table']].name,
+            'version': points.POINT_TABLES[data['point_table']].version
+        })
+    writer.start("SESSIONS")
     for n in data['sessions'].keys():
         session_data = data['sessions'][n]
-        session = ET.SubElement(sessions, "SESSION", {
+        writer.start("SESSION", {
             'number': session_data['infos']['number'],
             'date': session_data['infos']['date'],
             'daytime': session_data['infos']['daytime']
         })
-        events = ET.SubElement(session, "EVENTS")
+        writer.start("EVENTS")
         for e in session_data['events']:
-            event = ET.SubElement(events, "EVENT", {
+            writer.start("EVENT", {
                 'number': e['lenex']['event']['number'],
                 'eventid': e['lenex']['event']['eventid'],
                 
@@ -612,147 +733,178 @@ def build_lenex() -> str:
                 'round': e['lenex']['event']['round'],
                 'daytime': e['lenex']['event']['daytime']
             })
-            ET.SubElement(event, "SWIMSTYLE", {
+            writer.element("SWIMSTYLE", {
                 'distance': e['lenex']['swimstyle']['distance'],
                 'relaycount': e['lenex']['swimstyle']['relaycount'],
                 'stroke': e['lenex']['swimstyle']['stroke']
             })
-            agegroups = ET.SubElement(event, "AGEGROUPS")
-            agegroup = ET.SubElement(agegroups, "AGEGROUP", {
-                'agegroupid': e['agegroup']['id'],
-                'agemax': e['agegroup']['age_costraints']['agemax'],
-                'agemin': e['agegroup']['age_costraints']['agemin']
+            writer.start("AGEGROUPS")
+            writer.start("AGEGROUP", {
+                'agegroupid': str(e['agegroup'].id),
+                'agemax': e['agegroup'].agemax,
+                'agemin': e['agegroup'].agemin
             })
-            rankings = ET.SubElement(agegroup, "RANKINGS")
-            for r in e['agegroup']['results']:
-                ET.SubElement(rankings, "RANKING", {
-                    'order': r['order'],
-                    'place': r['place'],
-                    'resultid': r['resultid']
+            writer.start("RANKINGS")
+            for place, resultid in enumerate(e['agegroup'].rankings, 1):
+                writer.element("RANKING", {
+                    'order': str(place),
+                    'place': str(place),
+                    'resultid': str(resultid)
                 })
-            heats = ET.SubElement(event, "HEATS")
-            for h in e['heats'].keys():
-
-                ET.SubElement(heats, "HEAT", {
-                    'daytime': e['heats'][h]['daytime'],
-                    'heatid': e['heats'][h]['heatid'],
-                    'number': e['heats'][h]['number'],
+            writer.end()  # RANKINGS
+            writer.end()  # AGEGROUP
+            writer.end()  # AGEGROUPS
+            writer.start("HEATS")
+            for h in e['heats']:
+                writer.element("HEAT", {
+                    'daytime': h.daytime,
+                    'heatid': h.heatid,
+                    'number': str(h.number),
                 })
-
-    clubs = ET.SubElement(meet, "CLUBS")
-    for c in data['clubs'].keys():
-        club_infos = data['clubs'][c]['infos']
-        club = ET.SubElement(clubs, "CLUB", {
-            'name': requests.utils.unquote(club_infos['name']),
-            'code': utils.get_team_code(club_infos['name']),
-            'nation': club_infos['nation'],
-            'type': club_infos['type']
+            writer.end()  # HEATS
+            writer.end()  # EVENT
+        writer.end()  # EVENTS
+        writer.end()  # SESSION
+    writer.end()  # SESSIONS
+
+    writer.start("CLUBS")
+    pool_length = data['pool_length']
+    for club in data['clubs']:
+        writer.start("CLUB", {
+            'name': unquote(club.team.name),
+            'code': club.team.code or utils.get_team_code(club.team.name),
+            'nation': club.team.nation,
+            'type': club.team.type
         })
-        athletes = ET.SubElement(club, "ATHLETES")
-        club_athletes = data['clubs'][c]['athletes']
-        for a in club_athletes.keys():
-            athlete_infos = club_athletes[a]['athlete_infos']
-            athlete = ET.SubElement(athletes, "ATHLETE", {
-                'athleteid': athlete_infos['athleteid'],
-                'lastname': requests.utils.unquote(athlete_infos['lastname']),
-                'firstname': requests.utils.unquote(athlete_infos['firstname']),
-                'gender': athlete_infos['gender'],
-                'birthdate': f"{athlete_infos['birthdate']}-01-01"
+        writer.start("ATHLETES")
+        for athlete in club.athletes.values():
+            writer.start("ATHLETE", {
+                'athleteid': athlete.athleteid,
+                'lastname': unquote(athlete.lastname),
+                'firstname': unquote(athlete.firstname),
+                'gender': athlete.gender,
+                'birthdate': f"{athlete.birthdate}-01-01"
             })
-            if 'entries' in club_athletes[a].keys():
-                entries = ET.SubElement(athlete, "ENTRIES")
-                for e in club_athletes[a]['entries']:
-                    if 'meetinfo' in e.keys():  # single event race-entry
-                        entry = ET.SubElement(entries, "ENTRY", {
-                            'entrytime': e['entrytime'],
-                            'eventid': e['eventid'],
-                            'heat': e['heat'],
-                            'lane': e['lane']
-                        })
-                        ET.SubElement(entry, "MEETINFO", date=datetime.datetime.strptime(e['meetinfo'], "%d/%m/%Y").strftime("%Y-%m-%d"))
-                    else:  # relay event race-entry
-                        entry = ET.SubElement(entries, "ENTRY", {
-                            'entrytime': e['entrytime'],
-                            'eventid': e['eventid']
-                        })
-            # an athlete may not have reced in a signle events, but only in relays, so no results.
-            if 'results' in club_athletes[a].keys():
-                results = ET.SubElement(athlete, "RESULTS")
-                for r in club_athletes[a]['results']:
-                    result = ET.SubElement(results, "RESULT", {
-                        'eventid': r['eventid'],
-                        'resultid': r['resultid'],
-                        'place': r['place'],
-                        'lane': r['lane'],
-                        'heat': r['heat'],
-                        'heatid': r['heatid'],
-                        'swimtime': r['swimtime'],
-                        'points': r['points'],
-                        'reactiontime': r['reactiontime']
+            # an athlete may not have reced in a signle events, but only in relays, so no entries and results.
+            if athlete.entries is not None:
+                writer.start("ENTRIES")
+                for e in athlete.entries:
+                    writer.start("ENTRY", {
+                        'entrytime': model.lenex_time(e.entrytime),
+                        'eventid': str(e.eventid),
+                        'heat': str(e.heat),
+                        'lane': str(e.lane)
                     })
-                    splits = ET.SubElement(result, "SPLITS")
-                    for s in r['splits']:
-                        ET.SubElement(splits, "SPLIT", {
-                            'distance': s['distance'],
-                            'swimtime': s['swimtime']
-                        })
-        if len(data['clubs'][c]['relays']) > 0:
-            relays = ET.SubElement(club, "RELAYS")
-            for r in data['clubs'][c]['relays']:
-                relay = ET.SubElement(relays, "RELAY", {
+                    if e.meetinfo is not None:
+                        writer.element("MEETINFO", {'date': datetime.datetime.strptime(e.meetinfo, "%d/%m/%Y").strftime("%Y-%m-%d")})
+                    writer.end()  # ENTRY
+                writer.end()  # ENTRIES
+            if athlete.results is not None:
+                writer.start("RESULTS")
+                for r in athlete.results:
+                    writer.start("RESULT", {
+                        'eventid': str(r.eventid),
+                        'resultid': str(r.resultid),
+                        'place': str(r.place),
+                        'lane': str(r.lane),
+                        'heat': str(r.heat),
+                        'heatid': r.heatid,
+                        'swimtime': model.lenex_time(r.swimtime),
+                        'points': '' if r.points is None else str(r.points),
+                        'reactiontime': ''
+                    })
+                    write_splits(writer, r.splits, pool_length)
+                    writer.end()  # RESULT
+                writer.end()  # RESULTS
+            writer.end()  # ATHLETE
+        writer.end()  # ATHLETES
+        if len(club.relays) > 0:
+            writer.start("RELAYS")
+            for relay in club.relays:
+                writer.start("RELAY", {
                     'number': '1',  # only one relay per team is allowed in supported championships
                     'agemax': '-1',  # TODO: #10 handle categories in junior events
                     'agemin': '-1',  # '-1' value is default value
                     'agetotalmax': '-1',
-                    'gender': r['relay_infos']['gender'],
-                    'name': r['relay_infos']['team']['name']
+                    'gender': relay.gender,
+                    'name': club.team.name
                 })
-                results = ET.SubElement(relay, "RESULTS")
-
-                result = ET.SubElement(results, "RESULT", {
-                    'eventid': r['result']['eventid'],
-                    'resultid': r['result']['resultid'],
-                    'place': r['result']['place'],
-                    'lane': r['result']['lane'],
-                    'heat': r['result']['heat'],
-                    'heatid': r['result']['heatid'],
-                    'swimtime': r['result']['swimtime'],
-                    'reactiontime': r['result']['reactiontime']
+                writer.start("RESULTS")
+
+                r = relay.result
+                writer.start("RESULT", {
+                    'eventid': str(r.eventid),
+                    'resultid': str(r.resultid),
+                    'place': str(r.place),
+                    'lane': str(r.lane),
+                    'heat': str(r.heat),
+                    'heatid': r.heatid,
+                    'swimtime': model.lenex_time(r.swimtime),
+                    'reactiontime': ''
                 })
-                splits = ET.SubElement(result, "SPLITS")
-                for s in r['result']['splits']['data']:
-                    ET.SubElement(splits, "SPLIT", {
-                        'distance': s['distance'],
-                        'swimtime': s['swimtime']
+                write_splits(writer, r.splits, pool_length)
+
+                writer.start("RELAYPOSITIONS")
+                for number, p in enumerate(relay.positions, 1):
+                    writer.element("RELAYPOSITION", {
+                        'number': str(number),
+                        'athleteid': p.athleteid,
+                        'reactiontime': p.reactiontime
                     })
+                writer.end()  # RELAYPOSITIONS
+                writer.end()  # RESULT
+                writer.end()  # RESULTS
+                writer.end()  # RELAY
+            writer.end()  # RELAYS
+        writer.end()  # CLUB
+    writer.close()
+    if isinstance(data['clubs'], club_store.ClubStore):
+        data['clubs'].close()  # a `low_memory` build is written once, its spilled clubs are deleted
 
-                player_positions = ET.SubElement(result, "RELAYPOSITIONS")
-                for p in r['result']['splits']['player_positions']:
-                    ET.SubElement(player_positions, "RELAYPOSITION", {
-                        'number': p['number'],
-                        'athleteid': p['athleteid'],
-                        'reactiontime': p['reactiontime']
-                    })
 
-    dom = xml.dom.minidom.parseString(ET.tostring(root))
-    xml_string = dom.toprettyxml()
-    part1, part2 = xml_string.split('?>')
-    output_xml = part1 + 'encoding=\"{}\" standalone="no"?>\n'.format('utf-8') + part2
-    event_name: str = data['event']['name']
+def write_file(data: dict, output_format: str = 'lef') -> str:
+    """Writes the `LENEX` file in `processed_data/`
 
-    return {
-        'xml': output_xml,
-        'event_name': event_name.replace(' ', '_')
-    }
+    The file is written next to its destination and then moved over it, so readers never see a partial file.
 
+    Args:
+        data (dict): compiled data returned by `build_lenex`
+        output_format (str): file format
+            Possible values:
+                -`lef`: plain `XML`
+                -`lxf`: `XML` compressed in a ZIP archive, streamed into the archive's entry as it is generated
+
+    Returns:
+        str: path of the written file
+    """
+    path = f"processed_data/{data['event_name']}.{output_format}"
+    if output_format == 'lxf':
+        with zipfile.ZipFile(f'{path}.tmp', 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            with io.TextIOWrapper(archive.open(f"{data['event_name']}.lef", 'w'), encoding='utf-8') as xfile:
+                write_lenex(data['lenex'], xfile)
+    else:
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as xfile:
+            write_lenex(data['lenex'], xfile)
+    os.replace(f'{path}.tmp', path)
+    return path
 
-def write_file(data: dict):
-    with open(f"processed_data/{data['event_name']}.lef", 'w') as xfile:
-        xfile.write(data['xml'])
 
+def debug(data: dict, reference: str = 'processed_data/debug.lef') -> bool:
+    """Writes `processed_data/lenex_refactor.lef` and prints how its data differs from `reference`'s, see `lenex_diff`
 
-def debug(data: dict):
-    with open(f"processed_data/lenex_refactor.lef", 'w') as xfile:
-        xfile.write(data['xml'])
-    print(
-        f'check: {filecmp.cmp("processed_data/debug.lef", "examples/test.lef", shallow=False)}')
+    Args:
+        data (dict): data returned by `build_lenex`
+        reference (str): LENEX file known to be right, e.g. written before a refactor. The current output is stored
+            there if it doesn't exist yet
+
+    Returns:
+        bool: whether both files hold the same data
+    """
+    with open(f"processed_data/lenex_refactor.lef", 'w', encoding='utf-8') as xfile:
+        write_lenex(data['lenex'], xfile)
+    if not os.path.isfile(reference):
+        shutil.copyfile("processed_data/lenex_refactor.lef", reference)
+        print(f'check: no reference to compare with, {reference} written')
+        return True
+    import lenex_diff
+    return lenex_diff.report(reference, "processed_data/lenex_refactor.lef")
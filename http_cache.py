@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import metrics
+
+if TYPE_CHECKING:  # only imported to download, see `downloader`
+    import requests
+
+
+CACHE_DIR = 'processed_data/http_cache'
+IGNORED_PARAMS = ('x',)  # Microplus' cache busters: the counter of the file, or `CounterGenerale`
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class HttpCache:
+    """On-disk cache of `GET` responses, revalidated with conditional requests and downloaded compressed.
+
+    Entries are keyed by url without the `IGNORED_PARAMS`, so a file whose counter moved is revalidated against its
+    last downloaded version (`If-None-Match`/`If-Modified-Since`) and only downloaded again if the server says it
+    changed. Offline, every response comes from the cache and a missing entry is a connection error.
+
+    Args:
+        directory (str): cache directory
+        offline (bool): never touch the network
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, offline: bool = False) -> None:
+        self.directory = directory
+        self.offline = offline
+        self._lock = threading.Lock()
+        self.downloaded = 0  # responses with a body
+        self.revalidated = 0  # `304 Not Modified` responses, served from the cache
+        self.served = 0  # responses served from the cache without a request, offline
+        self.bytes = 0  # bytes received
+        self.saved_unchanged = 0  # bytes of the cached bodies that weren't downloaded again
+        self.saved_compression = 0  # bytes compression took off the downloaded bodies
+
+    def key(self, url: str) -> str:
+        parsed = urlparse(url)
+        query = urlencode([(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k not in IGNORED_PARAMS])
+        return hashlib.sha256(parsed._replace(query=query).geturl().encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[tuple[dict, bytes]]:
+        """Returns the metadata and the body of a cached response, `None` if it's not in the cache."""
+        try:
+            with open(f'{self.directory}/{key}.json', 'r') as f:
+                meta = json.loads(f.read())
+            with open(f'{self.directory}/{key}.body', 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return meta, body
+
+    def store(self, key: str, url: str, response: 'requests.Response') -> None:
+        pathlib.Path(self.directory).mkdir(parents=True, exist_ok=True)
+        tmp = f'{self.directory}/{key}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp, f'{self.directory}/{key}.body')
+        with open(tmp, 'w') as f:
+            f.write(json.dumps({'url': url, 'headers': {h: response.headers[h] for h in STORED_HEADERS if h in response.headers}}))
+        os.replace(tmp, f'{self.directory}/{key}.json')
+
+    def response(self, url: str, meta: dict, body: bytes) -> 'requests.Response':
+        """Rebuilds a cached response."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = body
+        return response
+
+    def get(self, session: 'requests.Session', url: str) -> tuple['requests.Response', int]:
+        """Performs a `GET` through the cache.
+
+        Args:
+            session (requests.Session): session performing the request
+            url (str): resource url
+
+        Returns:
+            tuple: the response, and the bytes received to get it
+        """
+        key = self.key(url)
+        cached = self.load(key)
+        if self.offline:
+            if cached is None:
+                import requests
+                raise requests.ConnectionError(f'{url} is not in the HTTP cache (offline)')
+            with self._lock:
+                self.served += 1
+                self.saved_unchanged += len(cached[1])
+            metrics.count(http_bytes_saved=len(cached[1]))
+            return self.response(url, *cached), 0
+
+        headers = {'Accept-Encoding': 'gzip, deflate'}
+        if cached is not None:
+            if 'ETag' in cached[0]['headers']:
+                headers['If-None-Match'] = cached[0]['headers']['ETag']
+            if 'Last-Modified' in cached[0]['headers']:
+                headers['If-Modified-Since'] = cached[0]['headers']['Last-Modified']
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self.revalidated += 1
+                self.saved_unchanged += len(cached[1])
+            metrics.count(http_bytes_saved=len(cached[1]))
+            return self.response(url, *cached), 0
+
+        # the body's size on the wire, before `requests` decompressed it
+        received = int(response.headers.get('Content-Length', len(response.content)))
+        if response.status_code == 200:
+            self.store(key, url, response)
+        with self._lock:
+            self.downloaded += 1
+            self.bytes += received
+            self.saved_compression += max(len(response.content) - received, 0)
+        metrics.count(http_bytes_saved=max(len(response.content) - received, 0))
+        return response, received
+
+    def report(self) -> str:
+        """Returns a summary of the requests made through the cache and of the bytes it saved."""
+        saved = self.saved_unchanged + self.saved_compression
+        return (f'http cache: {self.downloaded} downloaded ({self.bytes / 1024:.1f} kB), {self.revalidated} unchanged, '
+                f'{self.served} served offline, {saved / 1024:.1f} kB saved ({self.saved_unchanged / 1024:.1f} kB '
+                f'not downloaded again, {self.saved_compression / 1024:.1f} kB by compression)')
@@ -0,0 +1,176 @@
+import argparse
+import itertools
+import sys
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator, NamedTuple, Optional
+
+from lenex_reader import open_lenex
+
+
+DEFAULT_LIMIT = 50  # differences printed by `report`, the others are only counted
+
+# attribute telling apart the children of a record with the same tag, the others are told apart by their position
+IDENTITY = {
+    'AGEGROUP': 'agegroupid',
+    'HEAT': 'heatid',
+    'RANKING': 'order',
+    'ENTRY': 'eventid',
+    'SPLIT': 'distance',
+    'RELAYPOSITION': 'number',
+}
+
+Key = tuple[str, ...]  # (tag, id...) of a record
+
+
+class Difference(NamedTuple):
+    """A difference between two records with the same key. `field` is `None` when the whole record was added or
+    removed, `old` (`new`) is `None` when the record or field is missing from the first (second) file."""
+
+    key: Key
+    field: Optional[str]
+    old: Optional[str]
+    new: Optional[str]
+
+    def __str__(self) -> str:
+        record = f'{self.key[0]} {"/".join(self.key[1:])}'.strip()
+        if self.field is None:
+            return f'{record}: {"added" if self.old is None else "removed"}'
+        return f'{record}: {self.field} {self.old!r} -> {self.new!r}'
+
+
+def flatten(element: ET.Element, fields: dict[str, str], prefix: str = '') -> dict[str, str]:
+    """Adds the attributes of `element` and of its descendants to `fields`, keyed by their path.
+
+    Attribute order is irrelevant, children are identified by their `IDENTITY` attribute (or position), and container
+    elements without attributes (`HEATS`, `SPLITS`, ...) don't appear in the paths, e.g. `AGEGROUP[101].RANKING[1].resultid`.
+    """
+    for name, value in element.attrib.items():
+        fields[prefix + name] = value
+    positions: dict[str, int] = {}
+    for child in element:
+        if not child.attrib and child.tag.endswith('S'):
+            flatten(child, fields, prefix)
+            continue
+        id = child.get(IDENTITY.get(child.tag, ''))
+        if id is None:
+            position = positions[child.tag] = positions.get(child.tag, 0) + 1
+            id = None if position == 1 else str(position)
+        flatten(child, fields, f'{prefix}{child.tag}.' if id is None else f'{prefix}{child.tag}[{id}].')
+    return fields
+
+
+def records(source: IO[bytes]) -> Iterator[tuple[Key, dict[str, str]]]:
+    """Streams the records of a LENEX file: its meet, sessions, events, clubs, athletes and results, with their fields.
+
+    Each record holds its own attributes and those of its descendants that aren't records themselves (an event its
+    heats and rankings, a result its splits, ...) and is dropped from the tree once read. Results are keyed by
+    `resultid`, or by their athlete (relay) and event in files without resultids, relays are folded into their results.
+    """
+    path: list[ET.Element] = []
+    club: Key = ('',)
+    owner: dict[str, str] = {}  # fields of the athlete or relay the next results belong to
+    for action, element in ET.iterparse(source, events=('start', 'end')):
+        tag = element.tag
+        if action == 'start':
+            if tag == 'CLUB':
+                club = (element.get('clubid') or element.get('name', ''),)
+            elif tag == 'ATHLETE':
+                owner = {'athleteid': element.get('athleteid', '')}
+            elif tag == 'RELAY':
+                owner = {'club': club[0]} | {f'RELAY.{name}': value for name, value in element.attrib.items()}
+            path.append(element)
+            continue
+
+        path.pop()
+        if tag == 'RESULT':
+            resultid = element.get('resultid')
+            key = ('RESULT', resultid) if resultid is not None else \
+                ('RESULT', owner.get('athleteid') or owner['club'], owner.get('RELAY.gender', ''), element.get('eventid', ''))
+            yield key, flatten(element, dict(owner))
+        elif tag == 'ATHLETE':
+            yield ('ATHLETE', element.get('athleteid', '')), flatten(element, {'club': club[0]})
+        elif tag == 'CLUB':
+            yield ('CLUB',) + club, flatten(element, {})
+        elif tag == 'EVENT':
+            yield ('EVENT', element.get('eventid', '')), flatten(element, {})
+        elif tag == 'SESSION':
+            yield ('SESSION', element.get('number', '')), flatten(element, {})
+        elif tag in ('CONSTRUCTOR', 'MEET', 'LENEX'):
+            yield (tag,), flatten(element, {})
+        else:
+            continue
+        element.clear()  # a record's descendants are in its fields, or were records themselves
+        if path:
+            path[-1].remove(element)
+
+
+def compare(key: Key, old: dict[str, str], new: dict[str, str]) -> Iterator[Difference]:
+    for field, value in old.items():
+        if new.get(field) != value:
+            yield Difference(key, field, value, new.get(field))
+    for field, value in new.items():
+        if field not in old:
+            yield Difference(key, field, None, value)
+
+
+def diff(old_path: str, new_path: str) -> Iterator[Difference]:
+    """Compares two LENEX files (`.lef` or `.lxf`) record by record.
+
+    Both files are read at the same time, a record waits in its side's index until the record with the same key is read
+    from the other file: files listing their records in the same order are compared holding a handful of records, in
+    any case every record is read, indexed and compared once.
+
+    Args:
+        old_path (str): first file
+        new_path (str): second file
+
+    Yields:
+        Difference: the differences, as soon as they're found, then the records only one of the files has
+    """
+    pending: tuple[dict[Key, dict], dict[Key, dict]] = ({}, {})
+    with open_lenex(old_path) as old_source, open_lenex(new_path) as new_source:
+        for pair in itertools.zip_longest(records(old_source), records(new_source)):
+            for side, record in enumerate(pair):
+                if record is None:
+                    continue
+                key, fields = record
+                while key in pending[side]:  # a key repeated in the same file, matched in order of appearance
+                    key += ('',)
+                other = pending[1 - side].pop(key, None)
+                if other is None:
+                    pending[side][key] = fields
+                elif side == 1:
+                    yield from compare(key, other, fields)
+                else:
+                    yield from compare(key, fields, other)
+    for key in pending[0]:
+        yield Difference(key, None, '', None)
+    for key in pending[1]:
+        yield Difference(key, None, None, '')
+
+
+def report(old_path: str, new_path: str, limit: int = DEFAULT_LIMIT) -> bool:
+    """Prints the differences between two LENEX files, the first `limit` in full and a count of the others per record kind.
+
+    Returns:
+        bool: whether the files hold the same data
+    """
+    counts: dict[str, int] = {}
+    for n, difference in enumerate(diff(old_path, new_path)):
+        if n < limit:
+            print(difference)
+        counts[difference.key[0]] = counts.get(difference.key[0], 0) + 1
+    if not counts:
+        print(f'{old_path} and {new_path} hold the same data')
+        return True
+    print(f'{sum(counts.values())} differences: ' + ', '.join(f'{n} {kind}' for kind, n in counts.items()))
+    return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the data of two LENEX files, regardless of formatting and order.')
+    parser.add_argument('old', help='.lef or .lxf file')
+    parser.add_argument('new', help='.lef or .lxf file')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help='differences printed in full')
+    args = parser.parse_args()
+    sys.exit(0 if report(args.old, args.new, args.limit) else 1)
@@ -0,0 +1,283 @@
+import argparse
+import datetime
+import itertools
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+from array import array
+from typing import IO, Iterator, Optional
+from urllib.parse import unquote
+
+import metrics
+import model
+import points
+
+
+STREAMED = {'SESSION', 'EVENT', 'CLUB', 'ATHLETE', 'RELAY'}  # elements dropped from the tree once read
+
+
+def open_lenex(path: str) -> IO[bytes]:
+    """Opens a `.lef` file, or the `.lef` inside a `.lxf` archive, for reading."""
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        return archive.open(next(name for name in archive.namelist() if name.endswith('.lef')))
+    return open(path, 'rb')
+
+
+def point_table_key(name: str, version: str) -> Optional[str]:
+    """Returns the key of the `POINTTABLE` in `points.POINT_TABLES`, `None` if it isn't one of them."""
+    return next((key for key, table in points.POINT_TABLES.items() if (table.name, table.version) == (name, version)), None)
+
+
+def read_meetinfo(entry: ET.Element) -> Optional[str]:
+    meetinfo = entry.find('MEETINFO')
+    if meetinfo is None or not meetinfo.get('date'):
+        return None
+    return datetime.datetime.strptime(meetinfo.get('date'), "%Y-%m-%d").strftime("%d/%m/%Y")
+
+
+def read_splits(result: ET.Element) -> array:
+    return array('l', [model.decode_time(split.get('swimtime', '')) for split in result.iterfind('SPLITS/SPLIT')])
+
+
+class Reader:
+    """Streams a LENEX file into the structures of `build_lenex`, dropping every element as soon as it has been read.
+
+    Memory is bounded by the largest athlete or relay, not by the file: the meet's infos and sessions are small, clubs,
+    athletes and relays are handed over one by one.
+
+    Files written by other software are read as far as the model allows: results without a `resultid` get one, a
+    missing `AGEGROUP` is replaced by the one `get_heats` would use, individual reaction times and full birthdates are
+    dropped (see `model.Athlete`).
+
+    Args:
+        source (IO): LENEX document, see `open_lenex`
+    """
+
+    def __init__(self, source: IO[bytes]) -> None:
+        self.source = source
+        self.heats: dict[str, model.Code] = {}  # file's heatid -> heat number, for the results without a `heat`
+        self.resultids = itertools.count(1)
+        self.clubs = 0
+
+    def result(self, element: ET.Element) -> model.Result:
+        resultid = element.get('resultid')
+        heat = element.get('heat')
+        points = element.get('points', '')
+        return model.Result(
+            int(element.get('eventid')),
+            next(self.resultids) if resultid is None else int(resultid),
+            model.code(element.get('place', '')),
+            model.code(element.get('lane', '')),
+            self.heats.get(element.get('heatid'), '') if heat is None else model.code(heat),
+            model.decode_time(element.get('swimtime', '')),
+            read_splits(element),
+            int(points) if points.isdigit() else None
+        )
+
+    def athlete(self, element: ET.Element, team: int) -> model.Athlete:
+        athlete = model.Athlete(element.get('athleteid'), element.get('lastname', ''), element.get('firstname', ''),
+                                element.get('gender', ''), element.get('birthdate', '')[:4], team)
+        entries = element.find('ENTRIES')
+        if entries is not None:
+            athlete.entries = [model.Entry(int(entry.get('eventid')), model.decode_time(entry.get('entrytime', '')),
+                                           model.code(entry.get('heat', '')), model.code(entry.get('lane', '')),
+                                           read_meetinfo(entry))
+                               for entry in entries]
+        results = element.find('RESULTS')
+        if results is not None:
+            athlete.results = [self.result(result) for result in results]
+        return athlete
+
+    def relays(self, element: ET.Element, team: int) -> list[model.Relay]:
+        """A `model.Relay` for each of the relay's results."""
+        return [model.Relay(element.get('gender', ''), team, self.result(result),
+                            [model.RelayPosition(p.get('athleteid'), p.get('reactiontime', ''))
+                             for p in result.iterfind('RELAYPOSITIONS/RELAYPOSITION')])
+                for result in element.iterfind('RESULTS/RESULT')]
+
+    def event(self, element: ET.Element) -> dict:
+        """An event of a session, as in `convert_to_lenex`'s sessions."""
+        eventid = element.get('eventid')
+        agegroup_element = element.find('AGEGROUPS/AGEGROUP')
+        if agegroup_element is None:
+            agegroup = model.AgeGroup(int(f'10{eventid}'), '-1', '-1')
+        else:
+            agegroup = model.AgeGroup(int(agegroup_element.get('agegroupid')), agegroup_element.get('agemax', '-1'),
+                                      agegroup_element.get('agemin', '-1'))
+            agegroup.rankings = [int(ranking.get('resultid')) for ranking in agegroup_element.iterfind('RANKINGS/RANKING')]
+        heats = []
+        for heat in element.iterfind('HEATS/HEAT'):
+            number = model.code(heat.get('number', ''))
+            self.heats[heat.get('heatid')] = number
+            heats.append(model.Heat(int(eventid), number, heat.get('daytime', '')))
+        swimstyle = element.find('SWIMSTYLE')
+        return {
+            'lenex': {
+                'event': {
+                    'eventid': eventid,
+                    'number': element.get('number', eventid),
+                    'preveventid': element.get('preveventid', '-1'),
+                    'gender': element.get('gender', ''),
+                    'round': element.get('round', ''),
+                    'daytime': element.get('daytime', '')
+                },
+                'swimstyle': {key: swimstyle.get(key, '') for key in ['distance', 'relaycount', 'stroke']}
+            },
+            'agegroup': agegroup,
+            'heats': heats
+        }
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Reads the file.
+
+        Yields:
+            tuple: in document order
+                -`('meet', infos)`: constructor, event, pool_length and point_table, as returned by `get_competition_infos`
+                    (and the `point_table` key `build_lenex` adds), before the first session
+                -`('session', number, session)`: a session's infos and events
+                -`('club', club)`: a `model.Club`, before its athletes and relays
+                -`('athlete', club, athlete)`: a `model.Athlete` of `club`
+                -`('relay', club, relay)`: a `model.Relay` of `club`
+        """
+        constructor: dict = {}
+        event: dict = {}
+        point_table = None
+        meet_sent = False
+        session: Optional[dict] = None
+        club: Optional[model.Club] = None
+        path: list[ET.Element] = []
+        for action, element in ET.iterparse(self.source, events=('start', 'end')):
+            tag = element.tag
+            if action == 'start':
+                if tag == 'MEET':
+                    event = {key: element.get(key, '') for key in ['name', 'city', 'nation', 'course', 'timing']}
+                elif tag in ('SESSIONS', 'CLUBS') and not meet_sent:
+                    meet_sent = True
+                    yield 'meet', {
+                        'constructor': constructor,
+                        'event': event,
+                        'pool_length': 50 if event.get('course') == 'LCM' else 25,
+                        'point_table': point_table
+                    }
+                elif tag == 'SESSION':
+                    session = {'infos': {key: element.get(key, '') for key in ['number', 'date', 'daytime']}, 'events': []}
+                elif tag == 'CLUB':
+                    club = model.Club(model.Team(self.clubs, element.get('name', ''), element.get('nation', ''),
+                                                 element.get('type', 'CLUB'), element.get('code')))
+                    self.clubs += 1
+                    yield 'club', club
+                path.append(element)
+                continue
+
+            path.pop()
+            if tag == 'CONTACT' and path and path[-1].tag == 'CONSTRUCTOR':
+                constructor['CONTACT'] = {key: element.get(key, '') for key in ['zip', 'city', 'country', 'email', 'internet']}
+            elif tag == 'CONSTRUCTOR':
+                constructor.update({key: element.get(key, '') for key in ['name', 'registration', 'version']})
+                constructor.setdefault('CONTACT', {key: '' for key in ['zip', 'city', 'country', 'email', 'internet']})
+            elif tag == 'POOL' and path and path[-1].tag == 'MEET':
+                event['lanemin'], event['lanemax'] = element.get('lanemin', ''), element.get('lanemax', '')
+            elif tag == 'POINTTABLE' and path and path[-1].tag == 'MEET':
+                point_table = point_table_key(element.get('name'), element.get('version'))
+            elif tag == 'EVENT':
+                session['events'].append(self.event(element))
+            elif tag == 'SESSION':
+                yield 'session', session['infos']['number'], session
+                session = None
+            elif tag == 'ATHLETE':
+                yield 'athlete', club, self.athlete(element, club.team.id)
+            elif tag == 'RELAY':
+                name = element.get('name', '')
+                if name != club.team.name and unquote(name) == club.team.name:
+                    club.team.name = name  # Microplus-Lenex files keep the club's raw, percent-encoded name in `RELAY`
+                for relay in self.relays(element, club.team.id):
+                    yield 'relay', club, relay
+            elif tag == 'CLUB':
+                club = None
+            if tag in STREAMED:
+                element.clear()
+                if path:
+                    path[-1].remove(element)
+
+
+@metrics.stage('read_lenex')
+def load(path: str) -> dict:
+    """Reads a LENEX file (`.lef` or `.lxf`) back into the data returned by `build_lenex`, ready for `write_lenex`.
+
+    Events without rankings (files written by other software) are ranked by the places of their results.
+
+    Args:
+        path (str): path of the LENEX file
+
+    Returns:
+        dict: same keys as `build_lenex`'s
+    """
+    sessions: dict[str, dict] = {}
+    clubs: list[model.Club] = []
+    places: dict[int, list[tuple[int, int]]] = {}  # eventid -> (place, resultid) of its placed results
+    data: dict = {}
+    with open_lenex(path) as source:
+        for item in Reader(source):
+            kind = item[0]
+            if kind == 'athlete':
+                _, club, athlete = item
+                club.athletes[athlete.athleteid] = athlete
+                swims = athlete.results or []
+            elif kind == 'relay':
+                _, club, relay = item
+                club.relays.append(relay)
+                swims = [relay.result]
+            else:
+                if kind == 'meet':
+                    data = item[1]
+                elif kind == 'session':
+                    sessions[item[1]] = item[2]
+                elif kind == 'club':
+                    clubs.append(item[1])
+                continue
+            for result in swims:
+                if isinstance(result.place, int):
+                    places.setdefault(result.eventid, []).append((result.place, result.resultid))
+        metrics.count(files_read=1, bytes_read=source.tell())
+
+    for session in sessions.values():
+        for event in session['events']:
+            if not event['agegroup'].rankings:
+                event['agegroup'].rankings = [resultid for _, resultid in sorted(places.get(int(event['lenex']['event']['eventid']), []))]
+    data |= {'sessions': sessions, 'clubs': clubs}
+    return {
+        'lenex': data,
+        'event_name': data['event']['name'].replace(' ', '_')
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stream a LENEX file, reporting what it holds and the parse throughput.')
+    parser.add_argument('path', help='.lef or .lxf file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='also measure the peak memory allocated while parsing (slows the parse down)')
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        tracemalloc.start()
+    counts: dict[str, int] = dict.fromkeys(['session', 'event', 'club', 'athlete', 'relay', 'result'], 0)
+    started = time.perf_counter()
+    with open_lenex(args.path) as source:
+        for item in Reader(source):
+            if item[0] in counts:
+                counts[item[0]] += 1
+            if item[0] == 'session':
+                counts['event'] += len(item[2]['events'])
+            elif item[0] == 'athlete':
+                counts['result'] += len(item[2].results or [])
+            elif item[0] == 'relay':
+                counts['result'] += 1
+        size = source.tell()
+    seconds = time.perf_counter() - started
+
+    print(', '.join(f'{n} {kind}s' for kind, n in counts.items()))
+    print(f'{size / 1e6:.2f} MB in {seconds:.3f}s, {size / 1e6 / seconds:.1f} MB/s')
+    if args.trace_memory:
+        print(f'peak memory allocated: {tracemalloc.get_traced_memory()[1] / 1e6:.2f} MB')
@@ -0,0 +1,81 @@
+from typing import Optional, TextIO
+
+
+DECLARATION = '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n\n'
+BUFFER_SIZE = 64 * 1024
+
+
+def escape(value: str) -> str:
+    """Escapes an attribute value the way `xml.dom.minidom` does."""
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    return value
+
+
+class LenexWriter:
+    """Incremental, indented `XML` writer.
+
+    Elements are written to `stream` as soon as they are opened, only the path from the root to the current element is
+    kept in memory. The output matches `xml.dom.minidom`'s `toprettyxml()` (tab indentation, attributes in insertion
+    order, childless elements self-closed) preceded by the LENEX declaration.
+
+    Args:
+        stream (TextIO): output stream
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self._open: list[str] = []  # tags of the elements opened and not yet closed
+        self._pending = False  # the last opened element's start tag is still missing its closing `>`
+        self._buffer: list[str] = []
+        self._buffered = 0
+
+    def _write(self, data: str) -> None:
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        self.stream.write(''.join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+
+    def declaration(self) -> None:
+        self._write(DECLARATION)
+
+    def start(self, tag: str, attrs: Optional[dict[str, str]] = None) -> None:
+        """Opens an element, its children are the elements written until the matching `end()`."""
+        if self._pending:
+            self._write('>\n')
+        self._write(''.join(['\t' * len(self._open), '<', tag] +
+                            [f' {name}="{escape(value)}"' for name, value in (attrs or {}).items()]))
+        self._open.append(tag)
+        self._pending = True
+
+    def end(self) -> None:
+        """Closes the last opened element."""
+        tag = self._open.pop()
+        if self._pending:
+            self._write('/>\n')
+            self._pending = False
+        else:
+            indent = '\t' * len(self._open)
+            self._write(f'{indent}</{tag}>\n')
+
+    def element(self, tag: str, attrs: Optional[dict[str, str]] = None) -> None:
+        """Writes a childless element."""
+        self.start(tag, attrs)
+        self.end()
+
+    def close(self) -> None:
+        """Closes every element left open and flushes the buffered output to `stream`."""
+        while self._open:
+            self.end()
+        self.flush()
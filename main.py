@@ -1,24 +1,106 @@
-import inquirer
+import argparse
+import logging
 import re
-from functions import scrape_data, build_lenex, write_file, debug
-
-
-def main():
-    mode = inquirer.prompt([inquirer.List('mode', message="Execution mode", choices=[
-                            'Scrape and Compile', 'Compile only', 'Debug'])])['mode']
-    if mode == 'Scrape and Compile':
-        scrape_data(inquirer.prompt([inquirer.Text('url', message="Insert competition's url",
-                    validate=lambda _, x: re.match(
-                        'https://fin\d\d\d\d\.microplustiming\.com/NU_.*web\.php', x),
-        )])['url'])
-    elif mode == 'Debug':
-        debug(build_lenex())
+from typing import Optional
+from functions import scrape_data, get_competition_infos, build_lenex, write_file, debug
+from watch import watch
+import profiling
+import archive
+import functions
+import metrics
+
+
+MODES = {'scrape': 'Scrape and Compile', 'compile': 'Compile only', 'watch': 'Watch', 'debug': 'Debug'}
+
+
+def prompt_list(name: str, message: str, choices: list[str]) -> str:
+    import inquirer  # with blessed and readchar, most of the startup time: only loaded to ask something
+    return inquirer.prompt([inquirer.List(name, message=message, choices=choices)])[name]
+
+
+def prompt_url() -> str:
+    import inquirer
+    return inquirer.prompt([inquirer.Text('url', message="Insert competition's url",
+                           validate=lambda _, x: re.match(
+                               'https://fin\d\d\d\d\.microplustiming\.com/NU_.*web\.php', x),
+    )])['url']
+
+
+def main(profile: Optional[str] = None, archive_path: Optional[str] = None, offline: bool = False,
+         low_memory: bool = False, mode: Optional[str] = None, url: Optional[str] = None, course: Optional[str] = None,
+         nation: Optional[str] = None, output_format: Optional[str] = None):
+    """Runs the mode chosen by the user, asking only the options that aren't given: none with `mode`, `url` (to
+    scrape), `course`, `nation` (outside `utils.ITALIAN_VENUES`) and `output_format`
+
+    Args:
+        profile (str): directory where to write the profiles of the `scrape`, `convert` and `serialize` stages, see
+            `profiling.Profiler`. Nothing is profiled if `None`
+        archive_path (str): compile from this `archive.Archive` instead of `scraped_data/`, packing the scraped data
+            into it first when scraping
+        offline (bool): scrape from the HTTP cache only, see `http_cache.HttpCache`
+        low_memory (bool): bound the memory of the build, see `build_lenex`
+        mode (str): one of `MODES`' values
+        url (str): competition's url
+        course (str): pool length code, `SCM` or `LCM`
+        nation (str): venue's nation code
+        output_format (str): `lef` or `lxf`
+    """
+    if mode is None:
+        mode = prompt_list('mode', "Execution mode", list(MODES.values()))
+    if mode == 'Watch':
+        if profile is not None:
+            print('--profile is ignored in Watch mode')
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+        watch(url or prompt_url(), course=course, nation=nation, output_format=output_format or 'lef')
         exit()
-        
-    
-    write_file(build_lenex())
 
+    if mode != 'Scrape and Compile':
+        url = None
+    elif url is None:
+        url = prompt_url()
+    profiler = None if profile is None else profiling.Profiler(profile)
+    if url is not None:
+        with profiling.stage(profiler, 'scrape'):
+            scrape_data(url, offline=offline)
+        if archive_path is not None:
+            packed = archive.pack('scraped_data', archive_path)
+            print(f"{packed['documents']} documents packed in {archive_path}, {packed['shared']} already there")
+    if archive_path is not None:
+        functions.scraped.use(archive.Archive(archive_path))
+    # every question is asked before the profiled conversion starts
+    infos = get_competition_infos(course, nation)
+    if mode != 'Debug' and output_format is None:
+        output_format = prompt_list('format', "Output format", ['lef', 'lxf'])
+    with profiling.stage(profiler, 'convert'):
+        data = build_lenex(course=infos['event']['course'], nation=infos['event']['nation'], low_memory=low_memory)
+    with profiling.stage(profiler, 'serialize'):
+        if mode == 'Debug':
+            debug(data)
+        else:
+            path = write_file(data, output_format)
+            peak = metrics.max_rss()
+            print(f'{path} written' + (f', peak memory {peak / 1e6:.0f} MB' if peak else ''))
+    if profiler is not None:
+        print(f'profiles written: {", ".join(profiler.close())}')
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description='Scrape a Microplus competition and compile its LENEX file. Asks for every option not given, '
+                    'e.g. `main.py compile --course LCM --nation ITA --format lef` asks nothing.')
+    parser.add_argument('mode', nargs='?', choices=list(MODES.keys()), help='execution mode, asked if missing')
+    parser.add_argument('--url', help="competition's url, to scrape or watch")
+    parser.add_argument('--course', choices=['SCM', 'LCM'], help='pool length code')
+    parser.add_argument('--nation', help="venue's nation code, ITA for the usual italian venues")
+    parser.add_argument('--format', dest='output_format', choices=['lef', 'lxf'])
+    parser.add_argument('--profile', metavar='DIR',
+                        help='profile the scrape, convert and serialize stages, writing the profiles in DIR')
+    parser.add_argument('--archive', metavar='FILE',
+                        help="compile from FILE, an archive made by archive.py, packing the scraped data into it when scraping")
+    parser.add_argument('--offline', action='store_true',
+                        help='scrape without network access, serving every request from the HTTP cache')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='build one session at a time, spilling the clubs to disk, for very large meets')
+    args = parser.parse_args()
+    main(args.profile, args.archive, args.offline, args.low_memory, MODES.get(args.mode), args.url, args.course,
+         args.nation, args.output_format)
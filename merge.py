@@ -0,0 +1,183 @@
+import argparse
+import itertools
+import os
+import pathlib
+from typing import Optional
+from urllib.parse import unquote
+
+import functions
+import lenex_reader
+import model
+import points
+import swimrankings
+import utils
+
+
+def load_meet(path: str, course: Optional[str] = None, nation: Optional[str] = None,
+              point_table: str = points.DEFAULT_POINT_TABLE) -> dict:
+    """Loads a meet from a LENEX file, or compiles it from a meet's working directory (holding its `scraped_data/`).
+
+    Args:
+        path (str): `.lef`/`.lxf` file, working directory or `scraped_data` directory
+        course (str): pool length code, required to compile scraped data
+        nation (str): venue's nation code, optional for the venues in `utils.ITALIAN_VENUES`
+        point_table (str): key of the points table in `points.POINT_TABLES` scoring scraped data
+
+    Returns:
+        dict: `lenex` data, as returned by `build_lenex`
+    """
+    if not os.path.isdir(path):
+        return lenex_reader.load(path)['lenex']
+    workdir = pathlib.Path(path).resolve()
+    if workdir.name == 'scraped_data':
+        workdir = workdir.parent
+    with functions.meet_directory(workdir):
+        return functions.build_lenex(point_table, 1, course, nation, interactive=False)['lenex']
+
+
+def athlete_key(athlete: model.Athlete) -> tuple[str, ...]:
+    """Identity of an athlete across meets: accent-free, case-folded names, birth year and gender."""
+    return swimrankings.normalize(athlete.lastname, athlete.firstname, athlete.birthdate[:4]) + (athlete.gender,)
+
+
+class Merger:
+    """Merges meets into one, in the order they're added.
+
+    Clubs are the same when their `utils.get_team_code` is. Within a meet, athletes are told apart by their athleteid;
+    across meets, an athlete of a club is the one with the same `athlete_key` added by a previous meet, whose swims it
+    gets, and two athletes of the same meet are never merged. Every athlete of every club keeps its athleteid unless
+    another one already has it, so each athleteid in the merged meet is unique. Sessions, events and results are
+    numbered again after the ones of the meets already added, so their ids (and the heatids derived from them) never
+    collide.
+    """
+
+    def __init__(self) -> None:
+        self.data: Optional[dict] = None
+        self.sessions: dict[str, dict] = {}
+        self.teams = model.Teams()
+        self.clubs: list[model.Club] = []
+        self.club_ids: dict[str, int] = {}  # team code -> index in `clubs`
+        self.athletes: dict[tuple, list[model.Athlete]] = {}  # (club's team id, `athlete_key`) -> kept records
+        self.athleteids: set[str] = set()  # athleteids given so far
+        self.eventids = itertools.count(1)
+        self.resultids = itertools.count(1)
+        self.free_athleteids = (str(n) for n in itertools.count(1))
+
+    def club(self, team: model.Team) -> model.Club:
+        code = utils.get_team_code(unquote(team.name))  # names read from LENEX files are already url-decoded
+        index = self.club_ids.get(code)
+        if index is None:
+            index = self.club_ids[code] = len(self.clubs)
+            self.clubs.append(model.Club(self.teams[self.teams.intern(team.name, team.nation, team.type, team.code)]))
+        return self.clubs[index]
+
+    def athleteid(self, athleteid: str) -> str:
+        """Gives `athleteid` to a new athlete if it's free, a new athleteid otherwise."""
+        while athleteid in self.athleteids:
+            athleteid = next(self.free_athleteids)
+        self.athleteids.add(athleteid)
+        return athleteid
+
+    def add(self, data: dict) -> None:
+        """Adds a meet, the `lenex` data of `build_lenex` or `lenex_reader.load`. Its objects are renumbered in place."""
+        if self.data is None:
+            self.data = {key: value for key, value in data.items() if key not in ('sessions', 'clubs')}
+        elif data['event']['course'] != self.data['event']['course']:
+            raise ValueError(f"can't merge a {data['event']['course']} meet into a {self.data['event']['course']} one")
+        elif data['point_table'] != self.data['point_table']:
+            self.data['point_table'] = None  # results scored with different tables
+
+        eventids: dict[int, int] = {}
+        for session in data['sessions'].values():
+            for event in session['events']:
+                eventids[int(event['lenex']['event']['eventid'])] = next(self.eventids)
+        resultids: dict[int, int] = {}
+
+        def result(r: model.Result) -> model.Result:
+            r.eventid = eventids.get(r.eventid, r.eventid)
+            resultids[r.resultid] = r.resultid = next(self.resultids)
+            return r
+
+        kept: dict[tuple, model.Athlete] = {}  # (club's team id, meet's athleteid) -> kept record
+        athleteids: dict[str, str] = {}  # meet's athleteid -> merged one, for relay athletes of other clubs
+        claimed: set[int] = set()  # `id` of the kept records this meet's athletes were matched with
+        merged_clubs = [self.club(club.team) for club in data['clubs']]
+        for club, merged in zip(data['clubs'], merged_clubs):
+            for athlete in club.athletes.values():
+                for entry in athlete.entries or []:
+                    entry.eventid = eventids.get(entry.eventid, entry.eventid)
+                for r in athlete.results or []:
+                    result(r)
+                original = athlete.athleteid
+                record = kept.get((merged.team.id, original))  # clubs of the meet merged into one
+                if record is None:
+                    records = self.athletes.setdefault((merged.team.id, athlete_key(athlete)), [])
+                    record = next((r for r in records if id(r) not in claimed), None)
+                    if record is None:
+                        athlete.athleteid = self.athleteid(original)
+                        athlete.team = merged.team.id
+                        records.append(athlete)
+                        merged.athletes[athlete.athleteid] = record = athlete
+                    claimed.add(id(record))
+                    kept[(merged.team.id, original)] = record
+                if record is not athlete:
+                    record.add_swims(athlete)
+                athleteids.setdefault(original, record.athleteid)
+            for relay in club.relays:
+                result(relay.result)
+                relay.team = merged.team.id
+                merged.relays.append(relay)
+        for club, merged in zip(data['clubs'], merged_clubs):
+            for relay in club.relays:
+                for position in relay.positions:
+                    record = kept.get((merged.team.id, position.athleteid))
+                    position.athleteid = record.athleteid if record is not None else \
+                        athleteids.get(position.athleteid, position.athleteid)
+
+        for session in data['sessions'].values():
+            number = str(len(self.sessions) + 1)
+            session['infos']['number'] = number
+            for event in session['events']:
+                lenex = event['lenex']['event']
+                lenex['eventid'] = lenex['number'] = str(eventids[int(lenex['eventid'])])
+                if lenex['preveventid'].isdigit() and int(lenex['preveventid']) in eventids:
+                    lenex['preveventid'] = str(eventids[int(lenex['preveventid'])])
+                event['agegroup'].id = int(f'10{lenex["eventid"]}')
+                event['agegroup'].rankings = [resultids[r] for r in event['agegroup'].rankings if r in resultids]
+                for heat in event['heats']:
+                    heat.eventid = int(lenex['eventid'])
+            self.sessions[number] = session
+
+    def result(self, name: Optional[str] = None) -> dict:
+        """Returns the merged meet, as returned by `build_lenex`, named `name` or as the first meet."""
+        data = self.data | {'sessions': self.sessions, 'clubs': self.clubs}
+        if name is not None:
+            data['event'] = data['event'] | {'name': name}
+        return {'lenex': data, 'event_name': data['event']['name'].replace(' ', '_')}
+
+
+def merge(paths: list[str], name: Optional[str] = None, course: Optional[str] = None, nation: Optional[str] = None,
+          point_table: str = points.DEFAULT_POINT_TABLE) -> dict:
+    """Merges the meets at `paths` (LENEX files or scraped data, see `load_meet`) into one, see `Merger`.
+
+    Returns:
+        dict: merged data, as returned by `build_lenex`
+    """
+    merger = Merger()
+    for path in paths:
+        merger.add(load_meet(path, course, nation, point_table))
+        print(f'{path}: merged, {len(merger.clubs)} clubs, {len(merger.athleteids)} athletes so far')
+    return merger.result(name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge several meets into a single LENEX file.')
+    parser.add_argument('paths', nargs='+', help=".lef/.lxf files, or meets' working directories holding their scraped_data")
+    parser.add_argument('--name', help="merged meet's name, the first meet's by default")
+    parser.add_argument('--course', choices=['SCM', 'LCM'], help='pool length code of the scraped meets')
+    parser.add_argument('--nation', help="venue's nation code of the scraped meets")
+    parser.add_argument('--format', dest='output_format', choices=['lef', 'lxf'], default='lef')
+    args = parser.parse_args()
+
+    pathlib.Path('processed_data').mkdir(parents=True, exist_ok=True)
+    print(f'written: {functions.write_file(merge(args.paths, args.name, args.course, args.nation), args.output_format)}')
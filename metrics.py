@@ -0,0 +1,209 @@
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+
+PROMETHEUS_PREFIX = 'microplus_lenex'
+COUNTERS = ('files_read', 'bytes_read', 'http_requests', 'http_bytes', 'http_bytes_saved')
+
+
+class Stage:
+    """Totals of a pipeline stage, over all its calls."""
+
+    __slots__ = ('seconds', 'calls', 'peak_memory') + COUNTERS
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.calls = 0
+        self.peak_memory: Optional[int] = None
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Collector:
+    """Records wall time, call counts, reads, HTTP requests and peak memory of every stage.
+
+    Stages nest: a file read while parsing during a conversion counts towards both `parse` and `convert`.
+
+    Args:
+        trace_memory (bool): measure the peak of the memory allocated by Python in each stage, with `tracemalloc`.
+            Slows the pipeline down, the timings of a run tracing memory are not comparable to the others'
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.stages: dict[str, Stage] = {}
+        self._open: list[list] = []  # [stage, started, peak allocated since started] of the stages being run
+        self.started = time.time()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _fold_peak(self) -> None:
+        """Moves the allocation peak reached so far into every open stage, and restarts the measure."""
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._open:
+            frame[2] = max(frame[2], peak)
+        tracemalloc.reset_peak()
+
+    def enter(self, name: str) -> None:
+        if self.trace_memory:
+            self._fold_peak()
+        self._open.append([self.stages.setdefault(name, Stage()), time.perf_counter(), 0])
+
+    def exit(self) -> None:
+        if self.trace_memory:
+            self._fold_peak()
+        stage, started, peak = self._open.pop()
+        stage.seconds += time.perf_counter() - started
+        stage.calls += 1
+        if self.trace_memory:
+            stage.peak_memory = max(stage.peak_memory or 0, peak)
+
+    def count(self, **counters: int) -> None:
+        for frame in self._open:
+            for counter, value in counters.items():
+                setattr(frame[0], counter, getattr(frame[0], counter) + value)
+
+    def merge(self, stages: dict[str, dict], outer: str) -> None:
+        """Adds the stages recorded by another process (see `report()['stages']`) to these ones.
+
+        The counters of `outer`, the stage enclosing all the others there, also go to the stages open here, as if the
+        other process' work had been done in this one.
+        """
+        for name, recorded in stages.items():
+            stage = self.stages.setdefault(name, Stage())
+            stage.seconds += recorded['seconds']
+            stage.calls += recorded['calls']
+            if recorded['peak_memory'] is not None:
+                stage.peak_memory = max(stage.peak_memory or 0, recorded['peak_memory'])
+            for counter in COUNTERS:
+                setattr(stage, counter, getattr(stage, counter) + recorded[counter])
+        if outer in stages:
+            self.count(**{counter: stages[outer][counter] for counter in COUNTERS})
+
+    def report(self) -> dict:
+        """Returns the recorded stages, and the peak resident memory of the process."""
+        return {
+            'started': self.started,
+            'seconds': time.time() - self.started,
+            'max_rss_bytes': max_rss(),
+            'stages': {name: stage.as_dict() for name, stage in self.stages.items()}
+        }
+
+
+def max_rss() -> int:
+    """Returns the peak resident memory of the process, in bytes, 0 if the platform doesn't report it."""
+    try:
+        import resource  # Unix only
+    except ImportError:
+        try:
+            import psutil  # optional, reports the peak working set on Windows
+        except ImportError:
+            return 0
+        return getattr(psutil.Process().memory_info(), 'peak_wset', 0)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+_collector: Optional[Collector] = None
+
+
+def enable(trace_memory: bool = False) -> Collector:
+    """Starts recording, replacing the previous recording if any."""
+    global _collector
+    _collector = Collector(trace_memory)
+    return _collector
+
+
+def disable() -> Optional[Collector]:
+    """Stops recording, returns what was recorded."""
+    global _collector
+    collector, _collector = _collector, None
+    if collector is not None and collector.trace_memory:
+        tracemalloc.stop()
+    return collector
+
+
+def collector() -> Optional[Collector]:
+    return _collector
+
+
+def stage(name: str) -> Callable:
+    """Decorator recording every call of the function as a run of the stage `name`, a plain call when not recording."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _collector is None:
+                return func(*args, **kwargs)
+            _collector.enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _collector.exit()
+        return wrapper
+    return decorator
+
+
+def count(**counters: int) -> None:
+    """Adds to the counters (`COUNTERS`) of the stages being run."""
+    if _collector is not None:
+        _collector.count(**counters)
+
+
+def write_json(report: dict, path: str) -> None:
+    with open(f'{path}.tmp', 'w') as f:
+        f.write(json.dumps(report, indent=2))
+    os.replace(f'{path}.tmp', path)
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus(report: dict, labels: Optional[dict[str, str]] = None) -> str:
+    """Formats a report in the Prometheus text exposition format.
+
+    Args:
+        report (dict): `Collector.report()`
+        labels (dict): labels added to every sample, e.g. `{'meet': ...}`
+    """
+    def sample(name: str, value, extra: Optional[dict[str, str]] = None) -> str:
+        pairs = ','.join(f'{k}="{escape_label(str(v))}"' for k, v in ((labels or {}) | (extra or {})).items())
+        return f'{PROMETHEUS_PREFIX}_{name}{{{pairs}}} {value}' if pairs else f'{PROMETHEUS_PREFIX}_{name} {value}'
+
+    metrics = [
+        ('stage_seconds', 'Wall time spent in the stage', 'seconds'),
+        ('stage_calls', 'Calls of the stage', 'calls'),
+        ('stage_files_read', 'Files read during the stage', 'files_read'),
+        ('stage_bytes_read', 'Bytes read from files during the stage', 'bytes_read'),
+        ('stage_http_requests', 'HTTP requests made during the stage', 'http_requests'),
+        ('stage_http_bytes', 'Bytes downloaded during the stage', 'http_bytes'),
+        ('stage_http_bytes_saved', 'Bytes the HTTP cache saved during the stage', 'http_bytes_saved'),
+        ('stage_peak_memory_bytes', 'Peak memory allocated by Python during the stage', 'peak_memory'),
+    ]
+    lines = []
+    for name, description, key in metrics:
+        samples = [sample(name, stage[key], {'stage': stage_name})
+                   for stage_name, stage in report['stages'].items() if stage[key] is not None]
+        if samples:
+            lines += [f'# HELP {PROMETHEUS_PREFIX}_{name} {description}.', f'# TYPE {PROMETHEUS_PREFIX}_{name} gauge'] + samples
+    for name, description, value in [('max_rss_bytes', 'Peak resident memory of the process', report['max_rss_bytes']),
+                                     ('run_timestamp_seconds', 'Start of the recorded run', report['started']),
+                                     ('run_seconds', 'Duration of the recorded run', report['seconds'])]:
+        lines += [f'# HELP {PROMETHEUS_PREFIX}_{name} {description}.', f'# TYPE {PROMETHEUS_PREFIX}_{name} gauge',
+                  sample(name, value)]
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(report: dict, path: str, labels: Optional[dict[str, str]] = None) -> None:
+    """Writes a report as a Prometheus textfile (e.g. for node_exporter's textfile collector), replacing it atomically."""
+    with open(f'{path}.tmp', 'w') as f:
+        f.write(prometheus(report, labels))
+    os.replace(f'{path}.tmp', path)
@@ -0,0 +1,245 @@
+from array import array
+from typing import Iterator, Optional, Union
+
+import metrics
+from swimtime import SwimTime
+
+
+NO_TIME = -1  # encoded `NT`, a missing or invalid time
+
+Code = Union[int, str]  # a Microplus number, stored as `int` unless it doesn't round-trip (`DSQ`, `''`, `01`, ...)
+
+
+def code(value: str) -> Code:
+    """Encodes a Microplus number (place, heat, lane, ...) as an `int`, keeping the string when it's not a plain number."""
+    if value.isdigit() and str(int(value)) == value:
+        return int(value)
+    return value
+
+
+def encode_time(time: Optional[SwimTime]) -> int:
+    return NO_TIME if time is None else time.centiseconds
+
+
+def lenex_time(centiseconds: int) -> str:
+    """Formats an encoded time as LENEX `HH:MM:SS.ff`, `NT` for `NO_TIME`."""
+    return 'NT' if centiseconds == NO_TIME else SwimTime(centiseconds).lenex()
+
+
+def decode_time(time: str) -> int:
+    """Encodes a LENEX `HH:MM:SS.ff` time, `NO_TIME` for `NT` or a missing time."""
+    return NO_TIME if time == 'NT' or not time else SwimTime.from_lenex(time).centiseconds
+
+
+class Team:
+    """A club. Stored once per meet (or per event, while converting) and referenced by `id` everywhere else.
+
+    `code` is only set for clubs read from a LENEX file, the others' is derived from their name when written.
+    """
+
+    __slots__ = ('id', 'name', 'nation', 'type', 'code')
+
+    def __init__(self, id: int, name: str, nation: str, type: str = 'CLUB', code: Optional[str] = None) -> None:
+        self.id = id
+        self.name = name
+        self.nation = nation
+        self.type = type
+        self.code = code
+
+
+class Teams:
+    """Interning table of the clubs, keyed by name: ids are assigned in order of first appearance."""
+
+    __slots__ = ('_ids', 'records')
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self.records: list[Team] = []
+
+    def intern(self, name: str, nation: str, type: str = 'CLUB', code: Optional[str] = None) -> int:
+        """Returns the id of the club called `name`, adding it if it's new (the first nation, type and code seen win)."""
+        id = self._ids.get(name)
+        if id is None:
+            id = self._ids[name] = len(self.records)
+            self.records.append(Team(id, name, nation, type, code))
+        return id
+
+    def __getitem__(self, id: int) -> Team:
+        return self.records[id]
+
+    def __iter__(self) -> Iterator[Team]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class Entry:
+    """An athlete's entry to an individual event."""
+
+    __slots__ = ('eventid', 'entrytime', 'heat', 'lane', 'meetinfo')
+
+    def __init__(self, eventid: int, entrytime: int, heat: Code, lane: Code, meetinfo: Optional[str]) -> None:
+        self.eventid = eventid
+        self.entrytime = entrytime
+        self.heat = heat
+        self.lane = lane
+        self.meetinfo = meetinfo  # Microplus `dd/mm/YYYY` date, shared by the event's entries. `None` if unknown
+
+
+class Result:
+    """An individual or relay result. Split times are cumulative, one every `pool_length` meters."""
+
+    __slots__ = ('eventid', 'resultid', 'place', 'lane', 'heat', 'swimtime', 'points', 'splits')
+
+    def __init__(self, eventid: int, resultid: int, place: Code, lane: Code, heat: Code, swimtime: int,
+                 splits: array, points: Optional[int] = None) -> None:
+        self.eventid = eventid
+        self.resultid = resultid
+        self.place = place
+        self.lane = lane
+        self.heat = heat
+        self.swimtime = swimtime
+        self.points = points
+        self.splits = splits  # `array('l')` of encoded times
+
+    @property
+    def heatid(self) -> str:
+        return f'{self.heat}000{self.eventid}'
+
+
+class Athlete:
+    """An athlete, `entries` and `results` stay `None` for athletes that only swam relays.
+
+    `birthdate` is the birth year, the only part of it Microplus publishes.
+    """
+
+    __slots__ = ('athleteid', 'lastname', 'firstname', 'gender', 'birthdate', 'team', 'entries', 'results')
+
+    def __init__(self, athleteid: str, lastname: str, firstname: str, gender: str, birthdate: str, team: int,
+                 entry: Optional[Entry] = None, result: Optional[Result] = None) -> None:
+        self.athleteid = athleteid
+        self.lastname = lastname
+        self.firstname = firstname
+        self.gender = gender
+        self.birthdate = birthdate
+        self.team = team
+        self.entries: Optional[list[Entry]] = None if entry is None else [entry]
+        self.results: Optional[list[Result]] = None if result is None else [result]
+
+    def add_swims(self, other: 'Athlete') -> None:
+        """Appends the entries and results of another record of the same athlete."""
+        if other.entries is not None:
+            if self.entries is None:
+                self.entries = []
+            self.entries += other.entries
+        if other.results is not None:
+            if self.results is None:
+                self.results = []
+            self.results += other.results
+
+
+class RelayPosition:
+
+    __slots__ = ('athleteid', 'reactiontime')
+
+    def __init__(self, athleteid: str, reactiontime: str) -> None:
+        self.athleteid = athleteid
+        self.reactiontime = reactiontime
+
+
+class Relay:
+
+    __slots__ = ('gender', 'team', 'result', 'positions')
+
+    def __init__(self, gender: str, team: int, result: Result, positions: list[RelayPosition]) -> None:
+        self.gender = gender
+        self.team = team
+        self.result = result
+        self.positions = positions
+
+
+class Heat:
+
+    __slots__ = ('eventid', 'number', 'daytime')
+
+    def __init__(self, eventid: int, number: Code, daytime: str) -> None:
+        self.eventid = eventid
+        self.number = number
+        self.daytime = daytime
+
+    @property
+    def heatid(self) -> str:
+        return f'{self.number}000{self.eventid}'
+
+
+class AgeGroup:
+    """An event's agegroup, `rankings` holds its resultids in ranking order."""
+
+    __slots__ = ('id', 'agemax', 'agemin', 'rankings')
+
+    def __init__(self, id: int, agemax: str, agemin: str) -> None:
+        self.id = id
+        self.agemax = agemax
+        self.agemin = agemin
+        self.rankings: list[int] = []
+
+
+class EventResults:
+    """Everything `get_heats` reads from an event's results.
+
+    `athletes` holds one record per swim (per relay leg in relay events), their `team` ids refer to the event's own
+    `teams` table until `convert_to_lenex` moves them onto the meet's.
+    """
+
+    __slots__ = ('heats', 'agegroup', 'teams', 'athletes', 'relays')
+
+    def __init__(self, heats: list[Heat], agegroup: AgeGroup, teams: Teams, athletes: list[Athlete],
+                 relays: list[Relay]) -> None:
+        self.heats = heats
+        self.agegroup = agegroup
+        self.teams = teams
+        self.athletes = athletes
+        self.relays = relays
+
+
+class Club:
+    """A club's athletes, by athleteid in order of first appearance, and relays."""
+
+    __slots__ = ('team', 'athletes', 'relays')
+
+    def __init__(self, team: Team) -> None:
+        self.team = team
+        self.athletes: dict[str, Athlete] = {}
+        self.relays: list[Relay] = []
+
+
+@metrics.stage('clubs')
+def merge_clubs(events: list[EventResults]) -> list[Club]:
+    """Groups the athletes and relays of every event by club, indexed by the meet-wide team id.
+
+    The first record of an athlete is kept, the entries and results of its following records are appended to it.
+    """
+    teams = Teams()
+    clubs: list[Club] = []
+
+    def club(team: Team) -> Club:
+        id = teams.intern(team.name, team.nation, team.type, team.code)
+        if id == len(clubs):
+            clubs.append(Club(teams[id]))
+        return clubs[id]
+
+    for event in events:
+        for athlete in event.athletes:
+            athlete_club = club(event.teams[athlete.team])
+            first = athlete_club.athletes.get(athlete.athleteid)
+            if first is None:
+                athlete.team = athlete_club.team.id
+                athlete_club.athletes[athlete.athleteid] = athlete
+            else:
+                first.add_swims(athlete)
+        for relay in event.relays:
+            relay_club = club(event.teams[relay.team])
+            relay.team = relay_club.team.id
+            relay_club.relays.append(relay)
+    return clubs
@@ -0,0 +1,120 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+import downloader
+import functions
+import points
+
+
+DEFAULT_QUEUE_SIZE = 64  # downloaded files waiting for the conversion stage
+
+
+class Converter:
+    """Conversion stage: converts each event as soon as the files it reads are on disk (see `functions.event_paths`),
+    storing it in the event cache.
+
+    Events are known once the schedules are downloaded (`scrape_data` fetches them first). An event converted from a
+    file that is downloaded again later is converted again; the final build reuses every conversion whose input files
+    are the ones on disk at the end, and converts the others.
+
+    Args:
+        pool_length (int): pool length
+        point_table (str): key of the points table in `points.POINT_TABLES`
+    """
+
+    def __init__(self, pool_length: int, point_table: str = points.DEFAULT_POINT_TABLE) -> None:
+        self.pool_length = pool_length
+        self.point_table = point_table
+        self.events: Optional[dict[str, list]] = None  # file path (relative to `scraped_data/`) -> its events
+        self.pending: list[str] = []  # files arrived before the events were known
+        self.converted = 0
+
+    def plan(self) -> None:
+        self.events = {}
+        for session in functions.plan_sessions().values():
+            for event in session:
+                paths = functions.event_paths(event['schedule'])
+                for path in paths:
+                    self.events.setdefault(path, []).append((event, paths))
+
+    def file(self, path: str) -> None:
+        """Called for each downloaded file."""
+        path = os.path.relpath(path, 'scraped_data')
+        if self.events is None:
+            if path.startswith('schedules/'):
+                return
+            self.plan()  # the first file after the schedules: every schedule is on disk
+        for event, paths in self.events.get(path, []):
+            if all(functions.scraped.store.exists(p) for p in paths):
+                functions.convert_event(event['schedule'], int(event['infos']['lenex']['event']['eventid']),
+                                        self.pool_length, self.point_table)
+                self.converted += 1
+
+
+def run(url: str, course: str, nation: Optional[str] = None, point_table: str = points.DEFAULT_POINT_TABLE,
+        output_format: str = 'lef', workers: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE,
+        download_workers: int = downloader.DEFAULT_WORKERS) -> str:
+    """Scrapes and compiles a meet with the download and the conversion overlapped.
+
+    The download runs in a background thread and hands every written file to the conversion stage through a bounded
+    queue (the download waits when the conversion falls `queue_size` files behind). Once the download is done,
+    `build_lenex` assembles the LENEX from the event cache, converting only what changed since, and the file is written.
+
+    Args:
+        url (str): competition's url
+        course (str): pool length code, `SCM` or `LCM`
+        nation (str): venue's nation code, see `get_competition_infos`
+        point_table (str): key of the points table in `points.POINT_TABLES`
+        output_format (str): `lef` or `lxf`, see `write_file`
+        workers (int): processes converting the events left to the final build, see `convert_to_lenex`
+        queue_size (int): max number of downloaded files waiting to be converted
+        download_workers (int): concurrent downloads
+
+    Returns:
+        str: path of the written file
+    """
+    files: queue.Queue = queue.Queue(maxsize=queue_size)
+    failure: list[BaseException] = []
+
+    def download() -> None:
+        try:
+            functions.scrape_data(url, download_workers, on_file=files.put)
+        except BaseException as e:  # re-raised by the conversion stage
+            failure.append(e)
+        finally:
+            files.put(None)
+
+    started = time.perf_counter()
+    converter = Converter(50 if course == 'LCM' else 25, point_table)
+    downloading = threading.Thread(target=download, name='pipeline-download', daemon=True)
+    downloading.start()
+    for path in iter(files.get, None):
+        converter.file(path)
+    downloading.join()
+    if failure:
+        raise failure[0]
+    downloaded = time.perf_counter() - started
+    print(f'download done in {downloaded:.2f}s, {converter.converted} event conversions overlapped with it')
+
+    data = functions.build_lenex(point_table, workers, course, nation)
+    path = functions.write_file(data, output_format)
+    print(f'{path} written {time.perf_counter() - started:.2f}s after the start, '
+          f'{time.perf_counter() - started - downloaded:.2f}s after the download')
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape and compile a meet, converting events while it downloads.')
+    parser.add_argument('url', help="competition's url")
+    parser.add_argument('--course', choices=['SCM', 'LCM'], required=True)
+    parser.add_argument('--nation', help="venue's nation code")
+    parser.add_argument('--format', dest='output_format', choices=['lef', 'lxf'], default='lef')
+    parser.add_argument('--point-table', choices=list(points.POINT_TABLES.keys()), default=points.DEFAULT_POINT_TABLE)
+    parser.add_argument('--workers', type=int, default=1, help='processes converting the events left to the final build')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args()
+    run(args.url, args.course, args.nation, args.point_table, args.output_format, args.workers, args.queue_size)
@@ -0,0 +1,124 @@
+from typing import Optional
+
+from swimtime import SwimTime
+
+
+FINA_2023_BASETIMES = {
+    "50_BACK_F_LCM": 26.98,
+    "50_BACK_F_SCM": 25.27,
+    "50_BACK_M_LCM": 23.8,
+    "50_BACK_M_SCM": 22.22,
+    "50_BREAST_F_LCM": 29.3,
+    "50_BREAST_F_SCM": 28.56,
+    "50_BREAST_M_LCM": 25.95,
+    "50_BREAST_M_SCM": 24.95,
+    "50_FLY_F_LCM": 24.43,
+    "50_FLY_F_SCM": 24.38,
+    "50_FLY_M_LCM": 22.27,
+    "50_FLY_M_SCM": 21.75,
+    "50_FREE_F_LCM": 23.67,
+    "50_FREE_F_SCM": 22.93,
+    "50_FREE_M_LCM": 20.91,
+    "50_FREE_M_SCM": 20.16,
+    "100_BACK_F_LCM": 57.45,
+    "100_BACK_F_SCM": 54.89,
+    "100_BACK_M_LCM": 51.85,
+    "100_BACK_M_SCM": 48.33,
+    "100_BREAST_F_LCM": 64.13,
+    "100_BREAST_F_SCM": 62.36,
+    "100_BREAST_M_LCM": 56.88,
+    "100_BREAST_M_SCM": 55.28,
+    "100_FLY_F_LCM": 55.48,
+    "100_FLY_F_SCM": 54.59,
+    "100_FLY_M_LCM": 49.45,
+    "100_FLY_M_SCM": 47.78,
+    "100_FREE_F_LCM": 51.71,
+    "100_FREE_F_SCM": 50.25,
+    "100_FREE_M_LCM": 46.91,
+    "100_FREE_M_SCM": 44.84,
+    "100_MEDLEY_F_SCM": 56.51,
+    "100_MEDLEY_M_SCM": 49.28,
+    "200_BACK_F_LCM": 123.35,
+    "200_BACK_F_SCM": 118.94,
+    "200_BACK_M_LCM": 111.92,
+    "200_BACK_M_SCM": 105.63,
+    "200_BREAST_F_LCM": 138.95,
+    "200_BREAST_F_SCM": 134.57,
+    "200_BREAST_M_LCM": 126.12,
+    "200_BREAST_M_SCM": 120.16,
+    "200_FLY_F_LCM": 121.81,
+    "200_FLY_F_SCM": 119.61,
+    "200_FLY_M_LCM": 110.73,
+    "200_FLY_M_SCM": 108.24,
+    "200_FREE_F_LCM": 112.98,
+    "200_FREE_F_SCM": 110.31,
+    "200_FREE_M_LCM": 102,
+    "200_FREE_M_SCM": 99.37,
+    "200_MEDLEY_F_LCM": 126.12,
+    "200_MEDLEY_F_SCM": 121.86,
+    "200_MEDLEY_M_LCM": 114,
+    "200_MEDLEY_M_SCM": 109.63,
+    "400_FREE_F_LCM": 236.46,
+    "400_FREE_F_SCM": 233.92,
+    "400_FREE_M_LCM": 220.07,
+    "400_FREE_M_SCM": 212.25,
+    "400_MEDLEY_F_LCM": 266.36,
+    "400_MEDLEY_F_SCM": 258.94,
+    "400_MEDLEY_M_LCM": 243.84,
+    "400_MEDLEY_M_SCM": 234.81,
+    "800_FREE_F_LCM": 484.79,
+    "800_FREE_F_SCM": 479.34,
+    "800_FREE_M_LCM": 452.12,
+    "800_FREE_M_SCM": 443.42,
+    "1500_FREE_F_LCM": 920.48,
+    "1500_FREE_F_SCM": 918.01,
+    "1500_FREE_M_LCM": 871.02,
+    "1500_FREE_M_SCM": 846.88
+}
+
+
+class PointTable:
+    """A points table, with its basetimes precomputed and keyed by (distance, stroke, gender, course).
+
+    Args:
+        name (str): LENEX `POINTTABLE` name
+        version (str): LENEX `POINTTABLE` version
+        basetimes (dict): `{distance}_{stroke}_{gender}_{course}` -> basetime in seconds
+    """
+
+    def __init__(self, name: str, version: str, basetimes: dict[str, float]) -> None:
+        self.name = name
+        self.version = version
+        self.basetimes: dict[tuple[int, str, str, str], float] = {}
+        for key, basetime in basetimes.items():
+            distance, stroke, gender, course = key.split('_')
+            self.basetimes[(int(distance), stroke, gender, course)] = basetime
+
+    def score(self, time: SwimTime, distance: int, stroke: str, gender: str, course: str) -> int:
+        """Returns the points of a single swim, raises `KeyError` if the table has no basetime for the race."""
+        return round(1000*(self.basetimes[(distance, stroke, gender, course)]/time.seconds)**3)
+
+    def score_event(self, times: list[Optional[SwimTime]], distance: int, stroke: str, gender: str, course: str) -> list[Optional[int]]:
+        """Scores every swim of an event at once.
+
+        Args:
+            times (list): swim times, `None` for swims without a time
+            distance (int): race distance
+            stroke (str): LENEX stroke
+            gender (str): `M` or `F`
+            course (str): `LCM` or `SCM`
+
+        Returns:
+            list: points, in the same order as `times`. `None` for swims without a time, or if the table has no basetime for the race
+        """
+        basetime = self.basetimes.get((distance, stroke, gender, course))
+        if basetime is None:
+            return [None] * len(times)
+        return [None if t is None else round(1000*(basetime/(t.centiseconds/100))**3) for t in times]
+
+
+POINT_TABLES = {
+    '2023': PointTable('FINA Point Scoring', '2023', FINA_2023_BASETIMES)
+}
+
+DEFAULT_POINT_TABLE = '2023'
@@ -0,0 +1,107 @@
+import cProfile
+import collections
+import contextlib
+import os
+import pathlib
+import sys
+import threading
+from typing import Iterator, Optional
+
+
+DEFAULT_INTERVAL = 0.005  # seconds between two stack samples
+TOP_FUNCTIONS = 40  # functions listed in each stage's text summary
+
+
+class Sampler(threading.Thread):
+    """Samples the stack of a thread at a fixed interval, counting identical stacks.
+
+    Args:
+        thread_id (int): `threading.get_ident()` of the sampled thread
+        interval (float): seconds between two samples
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL) -> None:
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stage: Optional[str] = None  # root frame of the samples, nothing is sampled outside the stages
+        self.stacks: collections.Counter = collections.Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            stage = self.stage
+            frame = sys._current_frames().get(self.thread_id)
+            if stage is None or frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[(stage, *reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """Returns the samples as collapsed stacks (`frame;frame;frame count`), the input of `flamegraph.pl`."""
+        return ''.join(f"{';'.join(f.replace(';', ':') for f in stack)} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class Profiler:
+    """Profiles the stages of a run, each one with `cProfile`, and samples their stacks for a flamegraph.
+
+    Writes in `directory`, on `close()`:
+        -`<stage>.prof`: the stage's `cProfile` profile, for `pstats`, snakeviz, ...
+        -`<stage>.txt`: the stage's most expensive functions, by cumulative time
+        -`stacks.collapsed`: the sampled stacks of every stage, rooted at the stage's name
+
+    Args:
+        directory (str): output directory
+        interval (float): seconds between two stack samples
+    """
+
+    def __init__(self, directory: str, interval: float = DEFAULT_INTERVAL) -> None:
+        self.directory = pathlib.Path(directory)
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.sampler = Sampler(threading.get_ident(), interval)
+        self.sampler.start()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profiles the code run in the `with` block as the stage `name`, a stage run more than once adds up."""
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        self.sampler.stage = name
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.sampler.stage = None
+
+    def close(self) -> list[str]:
+        """Stops sampling and writes the profiles.
+
+        Returns:
+            list: paths of the written files
+        """
+        import pstats  # only needed here, kept out of the startup of every run
+        self.sampler.stop()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, profile in self.profiles.items():
+            profile.dump_stats(self.directory / f'{name}.prof')
+            with open(self.directory / f'{name}.txt', 'w') as f:
+                pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            written += [str(self.directory / f'{name}.prof'), str(self.directory / f'{name}.txt')]
+        with open(self.directory / 'stacks.collapsed', 'w') as f:
+            f.write(self.sampler.collapsed())
+        written.append(str(self.directory / 'stacks.collapsed'))
+        return written
+
+
+def stage(profiler: Optional[Profiler], name: str) -> contextlib.AbstractContextManager:
+    """`profiler.stage(name)`, or a no-op context when not profiling."""
+    return contextlib.nullcontext() if profiler is None else profiler.stage(name)
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import metrics
+import model
+import utils
+from swimtime import SwimTime
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB of source JSON
+
+
+class Directory:
+    """Scraped data stored as plain files under `root`, as `scrape_data` writes them. The default `ScrapedData` store.
+
+    A store maps paths relative to the scraped data root (e.g. `results/NU... 001.JSON`) to documents, see also
+    `archive.Archive`.
+
+    Args:
+        root (str): scraped data directory
+    """
+
+    def __init__(self, root: str = 'scraped_data') -> None:
+        self.root = root
+
+    def stat(self, path: str) -> tuple:
+        """Returns the version of the document, which changes whenever its content does, and its size."""
+        stat = os.stat(os.path.join(self.root, path))
+        return stat.st_mtime_ns, stat.st_size
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(os.path.join(self.root, path))
+
+    def read(self, path: str) -> bytes:
+        with open(os.path.join(self.root, path), 'rb') as f:
+            return f.read()
+
+    def names(self, folder: str) -> list[str]:
+        """Returns the names of the documents in `folder`."""
+        return os.listdir(os.path.join(self.root, folder))
+
+    def digest(self, path: str) -> str:
+        data = self.read(path)
+        metrics.count(files_read=1, bytes_read=len(data))
+        return hashlib.sha256(data).hexdigest()
+
+
+class ScrapedData:
+    """Owns every read of the scraped `JSON` files.
+
+    Parsed documents are memoized in an LRU bounded by the size of their source files, and are re-parsed only when
+    the file in the store changes, so a document is parsed at most once per build.
+
+    Args:
+        root (str): scraped data directory, read when no `store` is given
+        max_bytes (int): cache size cap, measured on the source files' size
+        store: where the documents are read from, a `Directory` (default) or an `archive.Archive`
+    """
+
+    def __init__(self, root: str = 'scraped_data', max_bytes: int = DEFAULT_MAX_BYTES, store=None) -> None:
+        self.store = Directory(root) if store is None else store
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._cache: OrderedDict[tuple, dict] = OrderedDict()  # (path, variant) -> {`mtime`, `size`, `value`}
+
+    def use(self, store) -> None:
+        """Reads from `store` from now on, forgetting every document cached from the previous one."""
+        self.clear()
+        self.store = store
+
+    def resize(self, max_bytes: int) -> None:
+        """Changes the cache size cap, evicting the least recently used documents above it."""
+        self.max_bytes = max_bytes
+        while self._size > self.max_bytes and len(self._cache) > 1:
+            self._evict(next(iter(self._cache)))
+
+    def _cached(self, path: str, variant: str, build, weighted: bool = True) -> dict:
+        version, file_size = self.store.stat(path)
+        key = (path, variant)
+        cached = self._cache.get(key)
+        if cached is not None and cached['version'] == version:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return cached['value']
+
+        self.misses += 1
+        if cached is not None:  # stale, the file changed in the store
+            self._evict(key)
+        value = build(path)
+        size = file_size if weighted else 0  # small values derived from a file don't count towards the cap
+        self._cache[key] = {'version': version, 'size': size, 'value': value}
+        self._size += size
+        while self._size > self.max_bytes and len(self._cache) > 1:
+            self._evict(next(iter(self._cache)))
+        return value
+
+    def _evict(self, key: tuple) -> None:
+        self._size -= self._cache.pop(key)['size']
+
+    @metrics.stage('parse')
+    def _parse(self, path: str) -> dict:
+        data = self.store.read(path)
+        metrics.count(files_read=1, bytes_read=len(data))
+        return json.loads(data)
+
+    def document(self, path: str) -> dict:
+        """Returns the parsed `JSON` document stored at `path` (relative to the scraped data root)."""
+        return self._cached(path, 'json', self._parse)
+
+    def event_path(self, category: str, race: str, round: str, kind: str) -> str:
+        """Returns the path of an event's file.
+
+        Args:
+            category (str): `event`'s category, e.g. `ASM`
+            race (str): `event`'s race, e.g. `100m Freestyle`
+            round (str): `event`'s Microplus round code, e.g. `001`
+            kind (str): file kind
+                Possible values:
+                    -`CLAS`: results
+                    -`STAR`: startlist
+
+        Returns:
+            str: path relative to the scraped data root
+        """
+        folder = 'results' if kind == 'CLAS' else 'startlists'
+        return f'{folder}/NU{category}{utils.RACE_CODES[race]}{kind}{round[::2]} 001.JSON'
+
+    def event_document(self, category: str, race: str, round: str, kind: str) -> dict:
+        return self.document(self.event_path(category, race, round, kind))
+
+    def results(self, category: str, race: str, round: str) -> dict:
+        return self.event_document(category, race, round, 'CLAS')
+
+    def entry_times(self, category: str, race: str, round: str) -> dict[str, int]:
+        """Returns the entry times of every athlete in an event's startlist.
+
+        Returns:
+            dict: `PlaCod` -> `athlete`'s entrytime, encoded as in `model.encode_time`
+        """
+        def build(path: str) -> dict[str, int]:
+            index: dict[str, int] = {}
+            for entry in self._parse(path)['data']:
+                if entry['PlaCod'] not in index:  # first occurrence wins, as in a linear scan
+                    index[entry['PlaCod']] = model.encode_time(SwimTime.parse(entry['MemIscr']))
+            return index
+        return self._cached(self.event_path(category, race, round, 'STAR'), 'entry_times', build)
+
+    def digest(self, path: str) -> Optional[str]:
+        """Returns the sha256 of the file stored at `path` (relative to the scraped data root), `None` if there is no such file."""
+        if not self.store.exists(path):
+            return None
+        return self._cached(path, 'sha256', self.store.digest, weighted=False)
+
+    def first_results(self) -> dict:
+        """Returns the first results file, which carries the competition's generic data."""
+        return self.document(f"results/{self.store.names('results')[0]}")
+
+    def sessions(self) -> list[int]:
+        """Returns the numbers of the sessions that have a `ScheduleByDate_N.JSON` file, in order."""
+        names = set(self.store.names('schedules/by_date'))
+        return [n for n in range(1, len(names) + 2) if f'ScheduleByDate_{n}.JSON' in names]
+
+    def schedule(self, session: int) -> dict:
+        return self.document(f'schedules/by_date/ScheduleByDate_{session}.JSON')
+
+    def clear(self, path: Optional[str] = None) -> None:
+        """Drops every cached document, or only the ones parsed from `path`."""
+        for key in list(self._cache.keys()):
+            if path is None or key[0] == path:
+                self._evict(key)
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'documents': len(self._cache),
+            'bytes': self._size
+        }
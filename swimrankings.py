@@ -0,0 +1,128 @@
+import html
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import Optional
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import downloader
+
+
+SEARCH_URL = 'https://www.swimrankings.net/index.php'
+DEFAULT_DB = 'swrid_cache.sqlite'
+DEFAULT_TTL = 30 * 24 * 3600  # a month, in seconds
+DEFAULT_RATE = 2.0  # requests per second to swimrankings.net
+DEFAULT_WORKERS = 4
+
+FIRST_LINK = re.compile(r'''<a\s[^>]*?href\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+
+
+def normalize(lastname: str, firstname: str, birthyear: Optional[str] = None) -> tuple[str, str, str]:
+    """Returns the cache key of an athlete: url-decoded, accent-free, case-folded names and the birth year."""
+    def name(n: str) -> str:
+        n = unicodedata.normalize('NFKD', unquote(n))
+        return ' '.join(''.join(c for c in n if not unicodedata.combining(c)).casefold().split())
+    return name(lastname), name(firstname), str(birthyear or '')
+
+
+def extract_swrid(page: str) -> Optional[str]:
+    """Returns the `athleteId` of the first link in a swimrankings.net search response, `None` if there is none."""
+    match = FIRST_LINK.search(page)
+    if match is None:
+        return None
+    url = html.unescape(match.group(1) if match.group(1) is not None else match.group(2))
+    return parse_qs(urlparse(url).query).get('athleteId', [None])[0]
+
+
+class SwridResolver:
+    """Resolves swimrankings.net ids (swrid), backed by a persistent SQLite cache.
+
+    Misses, including athletes swimrankings.net doesn't know, are cached for `ttl` seconds, the expired entries are
+    removed when the resolver is created.
+
+    Args:
+        db_path (str): SQLite cache file
+        ttl (float): seconds a cached id stays valid
+        rate (float): max requests per second to swimrankings.net
+        workers (int): concurrent requests when resolving many athletes
+        search_url (str): swimrankings.net search endpoint
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB, ttl: float = DEFAULT_TTL, rate: float = DEFAULT_RATE,
+                 workers: int = DEFAULT_WORKERS, search_url: str = SEARCH_URL) -> None:
+        self.ttl = ttl
+        self.rate = rate
+        self.workers = workers
+        self.search_url = search_url
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS swrid (
+                               lastname TEXT, firstname TEXT, birthyear TEXT, swrid TEXT, fetched REAL,
+                               PRIMARY KEY (lastname, firstname, birthyear))''')
+        self.evict_expired()  # keeps the file from growing with entries that will never be read again
+
+    def close(self) -> None:
+        self.db.close()
+
+    def query_url(self, lastname: str, firstname: str) -> str:
+        return (f'{self.search_url}?&internalRequest=athleteFind&athlete_clubId=-1&athlete_gender=-1'
+                f'&athlete_lastname={quote(unquote(lastname))}&athlete_firstname={quote(unquote(firstname))}')
+
+    def cached(self, key: tuple[str, str, str]) -> tuple[bool, Optional[str]]:
+        """Returns whether `key` has a valid cache entry, and its swrid."""
+        row = self.db.execute('SELECT swrid FROM swrid WHERE lastname = ? AND firstname = ? AND birthyear = ? AND fetched > ?',
+                              key + (time.time() - self.ttl,)).fetchone()
+        return (False, None) if row is None else (True, row[0])
+
+    def evict_expired(self) -> int:
+        """Removes the expired entries, returns how many were removed."""
+        removed = self.db.execute('DELETE FROM swrid WHERE fetched <= ?', (time.time() - self.ttl,)).rowcount
+        self.db.commit()
+        return removed
+
+    def get(self, lastname: str, firstname: str, birthyear: Optional[str] = None) -> Optional[str]:
+        return self.resolve_all([(lastname, firstname, birthyear)])[normalize(lastname, firstname, birthyear)]
+
+    def resolve_all(self, athletes: list[tuple]) -> dict[tuple[str, str, str], Optional[str]]:
+        """Resolves many athletes at once, fetching the cache misses concurrently under the rate limit.
+
+        Args:
+            athletes (list): `(lastname, firstname)` or `(lastname, firstname, birthyear)` tuples
+
+        Returns:
+            dict: `normalize`d athlete -> swrid, `None` if swimrankings.net doesn't know the athlete
+        """
+        resolved: dict[tuple[str, str, str], Optional[str]] = {}
+        misses: dict[str, list[tuple[str, str, str]]] = {}  # query url -> keys, the birth year is not part of the query
+        seen: set[tuple[str, str, str]] = set()
+        for athlete in athletes:
+            key = normalize(*athlete)
+            if key in seen:
+                continue
+            seen.add(key)
+            hit, swrid = self.cached(key)
+            if hit:
+                resolved[key] = swrid
+            else:
+                misses.setdefault(self.query_url(athlete[0], athlete[1]), []).append(key)
+
+        if misses:
+            with downloader.Downloader(self.workers, self.workers, rate=self.rate) as dl:
+                for url, response in dl.get_all(list(misses.keys())):
+                    swrid = extract_swrid(response.text)
+                    for key in misses[url]:
+                        resolved[key] = swrid
+                        self.db.execute('INSERT OR REPLACE INTO swrid VALUES (?, ?, ?, ?, ?)', key + (swrid, time.time()))
+            self.db.commit()
+        return resolved
+
+
+_resolver: Optional[SwridResolver] = None
+
+
+def resolver() -> SwridResolver:
+    """Returns the process-wide resolver, using the default cache file."""
+    global _resolver
+    if _resolver is None:
+        _resolver = SwridResolver()
+    return _resolver
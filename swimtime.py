@@ -0,0 +1,117 @@
+import re
+from functools import total_ordering
+from typing import Optional
+
+# `strptime`'s patterns for the formats `format_time` used: `%M'%S.%f` for times longer than 5 characters, `%S.%f` otherwise
+MINUTES_FORMAT = re.compile(r"([0-5]\d|\d)'(6[0-1]|[0-5]\d|\d)\.([0-9]{1,6})")
+SECONDS_FORMAT = re.compile(r"(6[0-1]|[0-5]\d|\d)\.([0-9]{1,6})")
+
+
+@total_ordering
+class SwimTime:
+    """A swim time, stored as integer centiseconds.
+
+    Args:
+        centiseconds (int): time in hundredths of a second
+    """
+
+    __slots__ = ('centiseconds',)
+
+    def __init__(self, centiseconds: int) -> None:
+        self.centiseconds = centiseconds
+
+    @classmethod
+    def parse(cls, time: str) -> Optional['SwimTime']:
+        """Parses a Microplus time (`M'SS.ff` or `SS.ff`, entrytimes may carry a trailing `*`).
+
+        Args:
+            time (str): Microplus time
+
+        Returns:
+            SwimTime: parsed time, `None` if the time is too short to be valid (e.g. `DNF`, `""`)
+        """
+        if '*' in time:  # remove '*' from entrytimes
+            time = time.replace('*', '')
+
+        if len(time) < 4:
+            return None
+
+        if time.isascii():
+            if len(time) == 7 and time[1] == "'" and time[4] == '.' and time[2:4].isdigit() and time[5:].isdigit():  # M'SS.ff
+                return cls._checked(0, int(time[0]), int(time[2:4]), int(time[5:]), time)
+            if len(time) == 5 and time[2] == '.' and time[:2].isdigit() and time[3:].isdigit():  # SS.ff
+                return cls._checked(0, 0, int(time[:2]), int(time[3:]), time)
+
+        if len(time) > 5:
+            match = MINUTES_FORMAT.fullmatch(time)
+            if match is None:
+                raise ValueError(f"time data '{time}' does not match format \"M'SS.ff\"")
+            minutes, seconds, fraction = match.groups()
+        else:
+            match = SECONDS_FORMAT.fullmatch(time)
+            if match is None:
+                raise ValueError(f"time data '{time}' does not match format \"SS.ff\"")
+            minutes, (seconds, fraction) = '0', match.groups()
+        # like `strptime`'s `%f`, the fraction is left aligned: `.5` is 50 hundredths, digits past the second are dropped
+        return cls._checked(0, int(minutes), int(seconds), int(fraction[:2].ljust(2, '0')), time)
+
+    @classmethod
+    def from_lenex(cls, time: str) -> 'SwimTime':
+        """Parses a LENEX `HH:MM:SS.ff` time."""
+        if len(time) == 11 and time[2] == ':' and time[5] == ':' and time[8] == '.':
+            return cls._checked(int(time[:2]), int(time[3:5]), int(time[6:8]), int(time[9:]), time)
+        hours, minutes, seconds = time.split(':')
+        return cls._from_parts(hours, minutes, seconds, time)
+
+    @classmethod
+    def _from_parts(cls, hours, minutes, seconds: str, time: str) -> 'SwimTime':
+        whole, _, fraction = seconds.partition('.')
+        try:
+            minutes, whole = int(minutes), int(whole)
+            # like `strptime`'s `%f`, the fraction is left aligned: `.5` is 50 hundredths, digits past the second are dropped
+            hundredths = int(fraction[:2]) * 10 if len(fraction) == 1 else int(fraction[:2])
+        except ValueError:
+            raise ValueError(f"time data '{time}' is not a valid swim time") from None
+        if len(fraction) > 6:
+            raise ValueError(f"time data '{time}' is not a valid swim time")
+        return cls._checked(int(hours), minutes, whole, hundredths, time)
+
+    @classmethod
+    def _checked(cls, hours: int, minutes: int, seconds: int, hundredths: int, time: str) -> 'SwimTime':
+        if not (0 <= minutes <= 59 and 0 <= seconds <= 59 and 0 <= hundredths <= 99 and hours >= 0):
+            raise ValueError(f"time data '{time}' is not a valid swim time")
+        return cls(((hours * 60 + minutes) * 60 + seconds) * 100 + hundredths)
+
+    def lenex(self) -> str:
+        """Formats the time as LENEX `HH:MM:SS.ff`."""
+        seconds, hundredths = divmod(self.centiseconds, 100)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return f'{hours % 24:02d}:{minutes:02d}:{seconds:02d}.{hundredths:02d}'
+
+    @property
+    def seconds(self) -> float:
+        return self.centiseconds / 100
+
+    def __add__(self, other: 'SwimTime') -> 'SwimTime':
+        return SwimTime(self.centiseconds + other.centiseconds)
+
+    def __sub__(self, other: 'SwimTime') -> 'SwimTime':
+        return SwimTime(self.centiseconds - other.centiseconds)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SwimTime) and self.centiseconds == other.centiseconds
+
+    def __lt__(self, other: 'SwimTime') -> bool:
+        return self.centiseconds < other.centiseconds
+
+    def __hash__(self) -> int:
+        return hash(self.centiseconds)
+
+    def __repr__(self) -> str:
+        return f'SwimTime({self.lenex()})'
+
+
+def lenex(time: Optional[SwimTime]) -> str:
+    """Formats an optional time as LENEX, `NT` (no time) when missing."""
+    return 'NT' if time is None else time.lenex()
@@ -0,0 +1,116 @@
+import gzip
+import http.server
+import tempfile
+import threading
+import unittest
+
+import requests
+
+import metrics
+from http_cache import HttpCache
+
+
+BODY = b'{"data": [' + b', '.join(b'{"PlaCod": "%d", "MemPrest": "59.99"}' % n for n in range(200)) + b']}'
+ETAG = '"v1"'
+
+
+class MicroplusHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in for a Microplus server: one `ETag`ged document, gzip-compressed on request, `304` when unchanged."""
+
+    requests: list[dict] = []  # path and headers of every request
+
+    def do_GET(self) -> None:
+        self.requests.append({'path': self.path, 'headers': dict(self.headers)})
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            return
+        body = BODY
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', ETAG)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(BODY)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_) -> None:
+        pass
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), MicroplusHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/NU_test/NU/NUASF001CLAS01 001.JSON'
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        MicroplusHandler.requests = []
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+
+    def test_not_modified_served_from_cache(self) -> None:
+        cache = HttpCache(self.directory.name)
+        response, received = cache.get(self.session, f'{self.url}?x=1')
+        self.assertEqual((response.status_code, response.content), (200, BODY))
+        self.assertGreater(received, 0)
+
+        response, received = cache.get(self.session, f'{self.url}?x=1')
+        self.assertEqual(MicroplusHandler.requests[-1]['headers'].get('If-None-Match'), ETAG)
+        self.assertEqual((response.status_code, response.content, received), (200, BODY, 0))
+        self.assertEqual(response.headers['ETag'], ETAG)
+        self.assertEqual((cache.downloaded, cache.revalidated), (1, 1))
+
+    def test_offline_miss_raises(self) -> None:
+        with self.assertRaises(requests.ConnectionError):
+            HttpCache(self.directory.name, offline=True).get(self.session, self.url)
+        self.assertEqual(MicroplusHandler.requests, [])
+
+        HttpCache(self.directory.name).get(self.session, self.url)
+        offline = HttpCache(self.directory.name, offline=True)
+        response, received = offline.get(self.session, self.url)
+        self.assertEqual((response.content, received, offline.served), (BODY, 0, 1))
+        self.assertEqual(len(MicroplusHandler.requests), 1)
+
+    def test_cache_buster_ignored(self) -> None:
+        cache = HttpCache(self.directory.name)
+        self.assertEqual(cache.key(f'{self.url}?x=1'), cache.key(f'{self.url}?x=2'))
+        self.assertEqual(cache.key(f'{self.url}?x=1&a=b'), cache.key(f'{self.url}?a=b&x=7'))
+        self.assertNotEqual(cache.key(f'{self.url}?x=1'), cache.key(f'{self.url}?x=1&a=b'))
+
+        cache.get(self.session, f'{self.url}?x=1')
+        response, _ = cache.get(self.session, f'{self.url}?x=2')  # the counter moved: revalidated, not downloaded
+        self.assertEqual(MicroplusHandler.requests[-1]['headers'].get('If-None-Match'), ETAG)
+        self.assertEqual(response.content, BODY)
+        self.assertEqual((cache.downloaded, cache.revalidated), (1, 1))
+
+    def test_bytes_saved(self) -> None:
+        cache = HttpCache(self.directory.name)
+        collector = metrics.enable()
+        self.addCleanup(metrics.disable)
+        get = metrics.stage('scrape')(cache.get)
+
+        _, received = get(self.session, self.url)
+        self.assertEqual(received, len(gzip.compress(BODY)))
+        self.assertEqual(cache.saved_compression, len(BODY) - received)
+        get(self.session, self.url)
+        self.assertEqual(cache.saved_unchanged, len(BODY))
+        self.assertEqual(cache.bytes, received)
+        self.assertEqual(collector.report()['stages']['scrape']['http_bytes_saved'], len(BODY) - received + len(BODY))
+        self.assertIn(f'{(2 * len(BODY) - received) / 1024:.1f} kB saved', cache.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import contextlib
+import io
+import os
+import pathlib
+import tempfile
+import unittest
+
+import functions
+import pipeline
+from benchmarks import synthetic
+
+
+class ConverterTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory.name)
+        self.addCleanup(functions.scraped.clear)
+        self.meet = synthetic.Meet('session')
+        self.meet.write_scraped_data('download')
+
+    def download(self, converter: pipeline.Converter) -> None:
+        """Moves the files into `scraped_data/` one at a time, schedules first, as `scrape_data` writes them."""
+        for source in sorted(pathlib.Path('download/scraped_data').rglob('*.JSON'),
+                             key=lambda p: p.parts[2] != 'schedules'):
+            path = pathlib.Path(*source.parts[1:])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, path)
+            converter.file(str(path))
+
+    def test_relays_without_startlist(self) -> None:
+        events = [event for event, _, _ in self.meet.events()]
+        relays = [event for event in events if 'x' in event['d_en']]
+        self.assertTrue(relays)
+        for event in relays:  # as in real exports, where the startlist of a relay may be missing
+            startlist = functions.scraped.event_path(event['c0'], event['d_en'], event['c2'], 'STAR')
+            os.remove(f'download/scraped_data/{startlist}')
+
+        converter = pipeline.Converter(self.meet.pool_length)
+        self.download(converter)
+        self.assertEqual(converter.converted, len(events))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            functions.build_lenex(course='LCM', nation='ITA')
+        self.assertIn(f'event cache: {len(events)}/{len(events)} hits', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+import functions
+from benchmarks import suite, synthetic
+
+
+class ScrapeManifestTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.server = suite.serve(os.path.join(self.directory.name, 'server'))
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        work = os.path.join(self.directory.name, 'work')
+        os.mkdir(work)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(work)
+        self.addCleanup(functions.scraped.clear)
+
+    def url(self, meet: synthetic.Meet, slug: str, counter_generale: int = 3) -> str:
+        path = meet.write_export(os.path.join(self.directory.name, 'server'), slug, counter_generale)
+        return f'http://127.0.0.1:{self.server.server_address[1]}{path}'
+
+    def test_unchanged_counters_skipped(self) -> None:
+        meet = synthetic.Meet('session')
+        url = self.url(meet, 'NU_a')
+        self.assertEqual(len(functions.scrape_data(url)), len(meet.files))
+        self.assertEqual(functions.scrape_data(url), [])
+
+    def test_another_meet_with_the_same_counters(self) -> None:
+        first = self.url(synthetic.Meet('session', name='Meet A'), 'NU_a')
+        meet = synthetic.Meet('session', seed=1, name='Meet B')
+        second = self.url(meet, 'NU_b')
+        functions.scrape_data(first)
+        self.assertEqual(len(functions.scrape_data(second)), len(meet.files))
+        self.assertEqual(functions.get_competition_infos('LCM', 'ITA')['event']['name'], 'Meet B')
+        self.assertEqual(functions.load_manifest(first)['files'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
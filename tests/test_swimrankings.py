@@ -0,0 +1,99 @@
+import http.server
+import os
+import tempfile
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+import swimrankings
+
+
+ATHLETES = {'ROSSI': '4001', 'MÜLLER': '4002', 'SMITH': '4003', 'MARTIN': '4004', 'SILVA': '4005', 'NAGY': '4006'}
+
+
+class SwimrankingsHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in for the swimrankings.net search: a link to the athlete if it's in `ATHLETES`, no link otherwise."""
+
+    requests: list[tuple[float, str]] = []  # (time, last name) of every search
+
+    def do_GET(self) -> None:
+        lastname = parse_qs(urlparse(self.path).query)['athlete_lastname'][0]
+        self.requests.append((time.monotonic(), lastname))
+        swrid = ATHLETES.get(lastname.upper())
+        body = '<table><tr><td>no athletes found</td></tr></table>' if swrid is None else \
+            f'<table><tr><td><a href="athleteDetail.php?page=athleteDetail&amp;athleteId={swrid}">{lastname}</a></td></tr></table>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *_) -> None:
+        pass
+
+
+class SwridResolverTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SwimrankingsHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.search_url = f'http://127.0.0.1:{cls.server.server_address[1]}/index.php'
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        SwimrankingsHandler.requests = []
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'swrid.sqlite')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def resolver(self, **options) -> swimrankings.SwridResolver:
+        resolver = swimrankings.SwridResolver(self.db_path, search_url=self.search_url, **({'rate': 100.0} | options))
+        self.addCleanup(resolver.close)
+        return resolver
+
+    def test_cache_hits(self) -> None:
+        self.assertEqual(self.resolver().get('Rossi', 'Anna', '2001'), '4001')
+        self.assertEqual(len(SwimrankingsHandler.requests), 1)
+        # a new resolver on the same file, with names spelled differently
+        self.assertEqual(self.resolver().get('ROSSI', ' anna ', '2001'), '4001')
+        self.assertEqual(self.resolver().get('M%C3%BCller', 'Jan'), '4002')
+        self.assertEqual(self.resolver().get('Muller', 'Jan'), '4002')
+        self.assertEqual(len(SwimrankingsHandler.requests), 2)
+
+    def test_unknown_athletes(self) -> None:
+        resolver = self.resolver()
+        self.assertIsNone(resolver.get('Nobody', 'Known', '1999'))
+        self.assertIsNone(resolver.get('Nobody', 'Known', '1999'))
+        self.assertEqual(len(SwimrankingsHandler.requests), 1)
+
+    def test_ttl_expiry(self) -> None:
+        self.resolver().resolve_all([('Rossi', 'Anna'), ('Nobody', 'Known')])
+        self.assertEqual(len(SwimrankingsHandler.requests), 2)
+        self.assertEqual(self.resolver(ttl=3600).get('Rossi', 'Anna'), '4001')
+        self.assertEqual(len(SwimrankingsHandler.requests), 2)
+
+        expired = self.resolver(ttl=0)  # every entry expired: removed on creation, and fetched again
+        self.assertEqual(expired.db.execute('SELECT COUNT(*) FROM swrid').fetchone()[0], 0)
+        self.assertEqual(expired.get('Rossi', 'Anna'), '4001')
+        self.assertEqual(len(SwimrankingsHandler.requests), 3)
+
+    def test_rate_limit(self) -> None:
+        athletes = [(lastname, 'Anna') for lastname in ATHLETES] + [('Rossi', 'Anna')]  # a duplicate, searched once
+        resolved = self.resolver(rate=10.0, workers=4).resolve_all(athletes)
+        self.assertEqual({key[0]: swrid for key, swrid in resolved.items()},
+                         {'rossi': '4001', 'muller': '4002', 'smith': '4003', 'martin': '4004', 'silva': '4005', 'nagy': '4006'})
+        times = sorted(t for t, _ in SwimrankingsHandler.requests)
+        self.assertEqual(len(times), len(ATHLETES))
+        # 10 requests per second: the 6 searches are started over at least half a second, whatever the workers
+        self.assertGreaterEqual(times[-1] - times[0], (len(times) - 1) / 10.0 * 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from swimtime import SwimTime
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_microplus_times(self) -> None:
+        for time, lenex in [("1'02.34", '00:01:02.34'), ('59.99', '00:00:59.99'), ("12'05.6", '00:12:05.60'),
+                            ('5.50', '00:00:05.50'), ("3'4.567", '00:03:04.56'), ('28.41*', '00:00:28.41')]:
+            self.assertEqual(SwimTime.parse(time).lenex(), lenex, time)
+
+    def test_invalid_times(self) -> None:
+        for time in ['', 'DNF', 'DSQ*', '.5']:
+            self.assertIsNone(SwimTime.parse(time), time)
+
+    def test_malformed_times_raise(self) -> None:
+        # rejected by the `strptime` formats the times were parsed with, they must not become plausible times
+        for time in ['1.94.', "'4.5", "6'6.6", ' 24.5', '4 .08', "3'048 .99", "52'53.29.", "1'60.00", "60'00.00",
+                     '1:02.34', "1'02.3456789", '١٢.34']:
+            with self.assertRaises(ValueError, msg=time):
+                SwimTime.parse(time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+import archive
+import functions
+import repository
+from benchmarks import synthetic
+
+
+class WorkersTest(unittest.TestCase):
+    """The conversion workers are started with `spawn`, as on macOS and Windows: they inherit no module state."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory.name)
+        synthetic.Meet('session').write_scraped_data()
+        start_method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        self.addCleanup(multiprocessing.set_start_method, start_method, force=True)
+        self.addCleanup(functions.scraped.use, repository.Directory())
+
+    def build(self, **options) -> str:
+        stream = io.StringIO()
+        functions.write_lenex(functions.build_lenex(course='LCM', nation='ITA', cache=False, **options)['lenex'], stream)
+        return stream.getvalue()
+
+    def test_directory(self) -> None:
+        self.assertEqual(self.build(workers=2), self.build())
+
+    def test_archive(self) -> None:
+        expected = self.build()
+        archive.pack('scraped_data', 'meet.sqlite')
+        shutil.rmtree('scraped_data')
+        functions.scraped.use(archive.Archive('meet.sqlite'))
+        self.assertEqual(self.build(workers=2), expected)
+        self.assertEqual(self.build(workers=2, low_memory=True), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
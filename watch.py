@@ -0,0 +1,103 @@
+import argparse
+import logging
+import time
+from typing import Optional
+
+import functions
+import metrics
+import points
+
+
+DEFAULT_INTERVAL = 10.0  # seconds between two polls of `CounterGenerale.json`
+
+logger = logging.getLogger('watch')
+
+
+def rebuild(course: str, nation: str, output_format: str, point_table: str, workers: int) -> str:
+    """Compiles the scraped data and atomically replaces the `LENEX` file in `processed_data/`.
+
+    Returns:
+        str: path of the written file
+    """
+    return functions.write_file(
+        functions.build_lenex(point_table, workers, course, nation), output_format)
+
+
+def export_metrics(url: str, metrics_path: Optional[str], prometheus_path: Optional[str]) -> None:
+    """Stops recording and writes the stages of the last build as a JSON report and/or a Prometheus textfile."""
+    report = metrics.disable().report()
+    if metrics_path is not None:
+        metrics.write_json(report, metrics_path)
+    if prometheus_path is not None:
+        metrics.write_prometheus(report, prometheus_path, {'url': url})
+
+
+def watch(url: str, interval: float = DEFAULT_INTERVAL, course: Optional[str] = None, nation: Optional[str] = None,
+          output_format: str = 'lef', point_table: str = points.DEFAULT_POINT_TABLE, workers: int = 1,
+          polls: Optional[int] = None, metrics_path: Optional[str] = None, prometheus_path: Optional[str] = None,
+          trace_memory: bool = False) -> None:
+    """Polls a competition and rebuilds its `LENEX` file every time its `CounterGenerale` changes.
+
+    Only the files whose counter moved are downloaded (see `functions.scrape_data`). The latency logged for each
+    rebuild goes from the poll that saw the new counter to the file being in place.
+
+    Args:
+        url (str): competition's url
+        interval (float): seconds between the start of two polls
+        course (str): pool length code, asked once at startup if missing
+        nation (str): venue's nation code, asked once at startup if missing and not deducible
+        output_format (str): `lef` or `lxf`, see `functions.write_file`
+        point_table (str): key of the points table in `points.POINT_TABLES`
+        workers (int): number of processes converting events, see `functions.convert_to_lenex`
+        polls (int): stop after this many polls, runs forever if `None`
+        metrics_path (str): JSON file replaced with the `metrics` of every build (the poll that triggered it included)
+        prometheus_path (str): Prometheus textfile replaced with the `metrics` of every build
+        trace_memory (bool): record the peak memory of every stage, see `metrics.Collector`
+    """
+    recording = metrics_path is not None or prometheus_path is not None
+    functions.scrape_data(url)
+    # ask the missing infos once, the following builds run unattended
+    infos = functions.get_competition_infos(course, nation)
+    course, nation = infos['event']['course'], infos['event']['nation']
+    if recording:
+        metrics.enable(trace_memory)
+    logger.info('initial build written to %s', rebuild(course, nation, output_format, point_table, workers))
+    if recording:
+        export_metrics(url, metrics_path, prometheus_path)
+
+    n = 0
+    while polls is None or n < polls:
+        n += 1
+        polled = time.perf_counter()
+        if recording:
+            metrics.enable(trace_memory)
+        try:
+            changed = functions.scrape_data(url)
+            if changed:
+                path = rebuild(course, nation, output_format, point_table, workers)
+                logger.info('%d files changed, %s rebuilt %.2fs after the counter change was seen',
+                            len(changed), path, time.perf_counter() - polled)
+                if recording:
+                    export_metrics(url, metrics_path, prometheus_path)
+        except Exception:  # a failed poll must not stop a live meet, the next one retries
+            logger.exception('poll failed')
+        metrics.disable()
+        time.sleep(max(0.0, interval - (time.perf_counter() - polled)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the LENEX file of a live competition as new results appear.')
+    parser.add_argument('url', help="competition's url")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between two polls')
+    parser.add_argument('--course', choices=['SCM', 'LCM'])
+    parser.add_argument('--nation', help="venue's nation code")
+    parser.add_argument('--format', dest='output_format', choices=['lef', 'lxf'], default='lef')
+    parser.add_argument('--point-table', choices=list(points.POINT_TABLES.keys()), default=points.DEFAULT_POINT_TABLE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--metrics', dest='metrics_path', help="JSON report of every build's stages")
+    parser.add_argument('--prometheus', dest='prometheus_path', help="Prometheus textfile of every build's stages")
+    parser.add_argument('--trace-memory', action='store_true', help='record the peak memory of every stage (slower)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    watch(args.url, args.interval, args.course, args.nation, args.output_format, args.point_table, args.workers,
+          metrics_path=args.metrics_path, prometheus_path=args.prometheus_path, trace_memory=args.trace_memory)